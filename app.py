@@ -1,12 +1,20 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
 import os
+import threading
+import click
 
+from cache import CachedUser, ResponseCache, UserCache
 from config import Config
-from models import db, User, Meal, Reservation, Prediction, RushHour
-from ml_model import predictor
+from data_import import BulkImporter, DEFAULT_CHUNK_SIZE
+from live import LiveFeed
+from scheduler import SlotScheduler
+from sweeper import NoShowSweeper
+from metrics import instrument_app, instrument_engine, registry
+from models import db, enable_sqlite_pragmas, ensure_indexes, keyset_page, OPEN_STATUSES, User, Meal, Reservation, Prediction, RushHour, PickupSlot
+from ml_model import predictor, FORECAST_HOURS
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -18,13 +26,48 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Cache for the polled public API; any committed write to these models clears it
+api_cache = ResponseCache(ttl=app.config['API_CACHE_TTL'])
+api_cache.invalidate_on_commit(db.session, [Meal, Reservation, RushHour])
+
+# Polls for stock and rush level changes and pushes them to /api/live subscribers
+live_feed = LiveFeed(app, predictor, interval=app.config['LIVE_FEED_INTERVAL'])
+
+# Spreads pickups over fixed slots so the counter is not swamped at peak times
+scheduler = SlotScheduler(
+    predictor,
+    app.config['CANTEEN_OPEN_TIME'],
+    app.config['CANTEEN_CLOSE_TIME'],
+    app.config['PICKUP_SLOT_MINUTES'],
+    app.config['PICKUP_SLOT_CAPACITY'],
+    app.config['FORECAST_DAYS']
+)
+
+# Spares authenticated requests a users-table lookup; user writes evict entries
+user_cache = UserCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+user_cache.invalidate_on_commit(db.session, User)
+
+def _read_user(user_id):
+    row = db.session.query(User.id, User.username, User.role, User.department).filter_by(id=user_id).first()
+    return CachedUser(*row) if row else None
+
+# Returns the stock of orders nobody picked up
+no_show_sweeper = NoShowSweeper(
+    app,
+    predictor,
+    app.config['PICKUP_GRACE_MINUTES'],
+    app.config['NO_SHOW_BATCH_SIZE']
+)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.get(int(user_id), _read_user)
 
 # Create database tables
 with app.app_context():
+    enable_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
     db.create_all()
+    ensure_indexes()
 
     # Create default admin if not exists
     admin = User.query.filter_by(username='admin').first()
@@ -40,6 +83,108 @@ with app.app_context():
         db.session.commit()
         print("✓ Default admin created (username: admin, password: admin123)")
 
+    # Populate the rush hour rollup for databases created before it was maintained
+    if RushHour.query.first() is None and Reservation.query.first() is not None:
+        RushHour.rebuild()
+        print("✓ Rush hour rollup rebuilt from reservation history")
+
+    predictor.warm_forecasts()
+
+    # Size today's and tomorrow's pickup slots before the first booking
+    for days_ahead in (0, 1):
+        scheduler.ensure_day(datetime.now().date() + timedelta(days=days_ahead))
+
+# Per-request latency, SQL statement counts and SQL time, served at /metrics
+with app.app_context():
+    instrument_engine(db.engine)
+instrument_app(app)
+
+# The forecast refresher and no-show sweeper run in processes that serve
+# requests, started by the first one: not in `flask` CLI commands, and in
+# each gunicorn worker after it has forked.
+background_lock = threading.Lock()
+background_started = False
+
+@app.before_request
+def start_background_threads():
+    global background_started
+    if background_started:
+        return
+
+    with background_lock:
+        if background_started:
+            return
+        if app.config['FORECAST_REFRESH_SECONDS']:
+            predictor.start_forecast_refresher(app, app.config['FORECAST_REFRESH_SECONDS'])
+        if app.config['NO_SHOW_SWEEP_SECONDS']:
+            no_show_sweeper.start(app.config['NO_SHOW_SWEEP_SECONDS'])
+        background_started = True
+
+# With QUERY_BUDGET set (e.g. in tests), a request that runs more SQL
+# statements fails, catching N+1 regressions.
+@app.after_request
+def enforce_query_budget(response):
+    budget = app.config['QUERY_BUDGET']
+    if budget and g.get('query_count', 0) > budget:
+        raise AssertionError(
+            f"{request.endpoint} ran {g.query_count} SQL statements (budget {budget})"
+        )
+    return response
+
+@app.cli.command('backfill-rush-hours')
+def backfill_rush_hours():
+    """Rebuild the rush hour rollup from reservation history."""
+    slots = RushHour.rebuild()
+    print(f"✓ Rebuilt {slots} rush hour slots")
+
+@app.cli.command('forecast-demand')
+def forecast_demand():
+    """Record actual demand for past forecasts and store upcoming ones."""
+    updated = predictor.backfill_actual_demand()
+    print(f"✓ Recorded actual demand for {updated} past forecasts")
+    stored = predictor.store_forecasts()
+    print(f"✓ Stored {stored} forecasts for the next {predictor.forecast_days} days")
+    for days_ahead in range(predictor.forecast_days):
+        scheduler.ensure_day(datetime.now().date() + timedelta(days=days_ahead))
+    print(f"✓ Pickup slots sized for the next {predictor.forecast_days} days")
+
+@app.cli.command('sweep-no-shows')
+def sweep_no_shows():
+    """Mark overdue reservations as no-shows and return their stock."""
+    swept = no_show_sweeper.sweep()
+    print(f"✓ Marked {swept} reservations as no-shows")
+
+@app.cli.command('import-data')
+@click.option('--users', type=click.Path(exists=True, dir_okay=False), help='CSV/Parquet of users')
+@click.option('--meals', type=click.Path(exists=True, dir_okay=False), help='CSV/Parquet of meals')
+@click.option('--reservations', type=click.Path(exists=True, dir_okay=False),
+              help='CSV/Parquet of reservation history')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, help='rows per insert and commit')
+@click.option('--default-password', help='password for users without a password column')
+def import_data(users, meals, reservations, chunk_size, default_password):
+    """Bulk import users, meals and reservation history."""
+    importer = BulkImporter(chunk_size, default_password)
+    for kind, path in [('users', users), ('meals', meals), ('reservations', reservations)]:
+        if path:
+            inserted, skipped = importer.load_file(kind, path)
+            print(f"✓ Imported {inserted} {kind} from {path} ({skipped} skipped)")
+
+    if reservations:
+        slots = RushHour.rebuild()
+        print(f"✓ Rebuilt {slots} rush hour slots")
+
+@app.cli.command('train-model')
+@click.option('--incremental', is_flag=True, help='only add reservations made since the last training')
+def train_model_command(incremental):
+    """Train the demand model and refresh stored forecasts."""
+    metrics = predictor.train_incremental() if incremental else predictor.train()
+    if not metrics:
+        print("✗ Insufficient data to train model")
+        return
+    print(f"✓ Model {metrics['version']} trained in {metrics['duration_seconds']}s ({metrics['mode']})")
+    stored = predictor.store_forecasts()
+    print(f"✓ Stored {stored} forecasts for the next {predictor.forecast_days} days")
+
 # ==================== ROUTES ====================
 
 @app.route('/')
@@ -131,6 +276,8 @@ def logout():
 @login_required
 def student_dashboard():
     min_booking_time = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M")
+    last_booking_day = datetime.now().date() + timedelta(days=scheduler.booking_days - 1)
+    max_booking_time = f"{last_booking_day:%Y-%m-%d}T{app.config['CANTEEN_CLOSE_TIME']}"
     if current_user.is_admin():
         return redirect(url_for('admin_dashboard'))
 
@@ -138,15 +285,17 @@ def student_dashboard():
     meals = Meal.query.filter_by(is_available=True).all()
 
     # Get user's active reservations
-    reservations = Reservation.query.filter_by(
+    reservations = Reservation.query.options(
+        db.joinedload(Reservation.meal)
+    ).filter_by(
         user_id=current_user.id
     ).filter(
-        Reservation.status.in_(['pending', 'confirmed'])
+        Reservation.status.in_(OPEN_STATUSES)
     ).order_by(Reservation.pickup_time).all()
 
     # Get rush hour predictions for today
     rush_hours = predictor.predict_rush_hours()
-    quiet_times = predictor.get_quiet_time_suggestions()
+    quiet_times = predictor.get_quiet_time_suggestions(rush_hours=rush_hours)
 
     return render_template(
         'student_dashboard.html',
@@ -154,7 +303,8 @@ def student_dashboard():
         reservations=reservations,
         rush_hours=rush_hours,
         quiet_times=quiet_times,
-        min_booking_time=min_booking_time
+        min_booking_time=min_booking_time,
+        max_booking_time=max_booking_time
     )
 
 @app.route('/student/menu')
@@ -181,9 +331,8 @@ def reserve_meal():
         flash('Meal not found', 'danger')
         return redirect(url_for('student_dashboard'))
 
-    # Check stock
-    if meal.stock < quantity:
-        flash('Insufficient stock available', 'danger')
+    if not quantity or quantity < 1:
+        flash('Invalid quantity', 'danger')
         return redirect(url_for('student_dashboard'))
 
     # Parse pickup time
@@ -193,33 +342,80 @@ def reserve_meal():
         flash('Invalid pickup time', 'danger')
         return redirect(url_for('student_dashboard'))
 
-    # Create reservation
-    reservation = Reservation(
-        user_id=current_user.id,
-        meal_id=meal_id,
-        pickup_time=pickup_time,
-        quantity=quantity,
-        status='confirmed'
-    )
-    reservation.generate_token()
+    if not scheduler.is_open(pickup_time):
+        flash(f"Pickup time must be between {app.config['CANTEEN_OPEN_TIME']} "
+              f"and {app.config['CANTEEN_CLOSE_TIME']}", 'danger')
+        return redirect(url_for('student_dashboard'))
 
-    # Update stock
-    meal.update_stock(-quantity)
+    now = datetime.now()
+    if pickup_time < now or not scheduler.in_booking_window(pickup_time.date(), now.date()):
+        flash(f"Pickup time must be within the next {app.config['FORECAST_DAYS']} days", 'danger')
+        return redirect(url_for('student_dashboard'))
 
-    db.session.add(reservation)
-    db.session.commit()
+    # Book a place in the pickup slot; Reservation.book commits it together
+    # with the reservation, or rolls it back if the meal is out of stock
+    scheduler.ensure_day(pickup_time.date())
+    if not PickupSlot.take(pickup_time):
+        suggestion = scheduler.nearest_free_slot(pickup_time, not_before=now)
+        if suggestion:
+            flash(f'The {pickup_time:%H:%M} pickup slot is full. '
+                  f'The nearest free slot starts at {suggestion.start:%H:%M}.', 'warning')
+        else:
+            flash('All pickup slots on that day are full', 'danger')
+        return redirect(url_for('student_dashboard'))
+
+    # Take stock and create the reservation atomically
+    reservation = Reservation.book(current_user.id, meal, pickup_time, quantity)
+    if not reservation:
+        flash('Insufficient stock available', 'danger')
+        return redirect(url_for('student_dashboard'))
 
     flash(f'Reservation confirmed! Your pickup token is: {reservation.token}', 'success')
     return redirect(url_for('student_dashboard'))
 
+def page_size():
+    """Page size requested with ?limit=, bounded by MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', app.config['PAGE_SIZE'], type=int)
+    return max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+def history_cursor(token):
+    """Decode a ?before= token written by ``reservation_history_page``"""
+    try:
+        created_at, reservation_id = token.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(reservation_id)
+    except (AttributeError, ValueError):
+        return None
+
+def reservation_history_page():
+    """Current user's reservations, newest first, after the ?before= cursor
+
+    Ordered by ``created_at`` (then id), because imported history gets new
+    ids but keeps its original creation times. The cursor is the last
+    row's ``<created_at>_<id>``.
+    """
+    reservations, last = keyset_page(
+        Reservation.query.options(db.joinedload(Reservation.meal)).filter_by(
+            user_id=current_user.id
+        ),
+        (Reservation.created_at, Reservation.id),
+        history_cursor(request.args.get('before')),
+        page_size(),
+        descending=True
+    )
+    next_cursor = f'{last[0].isoformat()}_{last[1]}' if last else None
+    return reservations, next_cursor
+
 @app.route('/student/reservations')
 @login_required
 def my_reservations():
-    reservations = Reservation.query.filter_by(
-        user_id=current_user.id
-    ).order_by(Reservation.created_at.desc()).all()
+    reservations, next_cursor = reservation_history_page()
 
-    return render_template('reservations.html', reservations=reservations)
+    return render_template(
+        'reservations.html',
+        reservations=reservations,
+        next_cursor=next_cursor,
+        is_first_page='before' not in request.args
+    )
 
 @app.route('/student/cancel/<int:reservation_id>', methods=['POST'])
 @login_required
@@ -241,7 +437,7 @@ def cancel_reservation(reservation_id):
 @login_required
 def rush_prediction():
     rush_hours = predictor.predict_rush_hours()
-    quiet_times = predictor.get_quiet_time_suggestions()
+    quiet_times = predictor.get_quiet_time_suggestions(rush_hours=rush_hours)
 
     return render_template('rush_prediction.html', rush_hours=rush_hours, quiet_times=quiet_times)
 
@@ -254,16 +450,30 @@ def admin_dashboard():
         flash('Access denied', 'danger')
         return redirect(url_for('student_dashboard'))
 
-    # Statistics
-    total_meals = Meal.query.count()
-    total_users = User.query.filter_by(role='student').count()
-    today_reservations = Reservation.query.filter(
-        db.func.date(Reservation.created_at) == datetime.utcnow().date()
-    ).count()
-    pending_reservations = Reservation.query.filter_by(status='pending').count()
+    # Statistics, fetched in a single round trip. Today's reservations use a
+    # half-open range so the created_at index can be used.
+    today_start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+
+    total_meals, total_users, today_reservations, pending_reservations = db.session.query(
+        db.session.query(db.func.count(Meal.id)).scalar_subquery(),
+        db.session.query(db.func.count(User.id)).filter(
+            User.role == 'student'
+        ).scalar_subquery(),
+        db.session.query(db.func.count(Reservation.id)).filter(
+            Reservation.created_at >= today_start,
+            Reservation.created_at < tomorrow_start
+        ).scalar_subquery(),
+        db.session.query(db.func.count(Reservation.id)).filter(
+            Reservation.status == 'pending'
+        ).scalar_subquery()
+    ).one()
 
     # Recent reservations
-    recent_reservations = Reservation.query.order_by(
+    recent_reservations = Reservation.query.options(
+        db.joinedload(Reservation.meal),
+        db.joinedload(Reservation.user)
+    ).order_by(
         Reservation.created_at.desc()
     ).limit(10).all()
 
@@ -294,8 +504,15 @@ def manage_meals():
         flash('Access denied', 'danger')
         return redirect(url_for('student_dashboard'))
 
-    meals = Meal.query.all()
-    return render_template('admin_meals.html', meals=meals)
+    meals, next_cursor = keyset_page(
+        Meal.query, Meal.id, request.args.get('after', type=int), page_size()
+    )
+    return render_template(
+        'admin_meals.html',
+        meals=meals,
+        next_cursor=next_cursor,
+        is_first_page='after' not in request.args
+    )
 
 @app.route('/admin/meals/add', methods=['GET', 'POST'])
 @login_required
@@ -370,6 +587,8 @@ def delete_meal(meal_id):
         flash('Cannot delete meal with active reservations', 'danger')
         return redirect(url_for('manage_meals'))
 
+    # Forecasts for a deleted meal are meaningless
+    Prediction.query.filter_by(meal_id=meal_id).delete(synchronize_session=False)
     db.session.delete(meal)
     db.session.commit()
 
@@ -383,20 +602,42 @@ def analytics():
         flash('Access denied', 'danger')
         return redirect(url_for('student_dashboard'))
 
-    # Get predictions for popular meals
-    meals = Meal.query.limit(10).all()
+    # Read the precomputed forecast grid, predicting live only for meals the
+    # batch job has not covered yet
+    meals = Meal.query.order_by(Meal.name).all()
+    hours = FORECAST_HOURS
+    today = datetime.utcnow().date()
+    forecast = predictor.stored_forecasts(today)
+    missing = [meal.id for meal in meals if meal.id not in forecast]
+    if missing:
+        forecast.update(predictor.predict_demand_batch(missing, today.weekday(), hours))
+
+    lunch_index = hours.index(12)
     predictions = []
+    demand_grid = []
 
     for meal in meals:
-        pred = predictor.predict_demand(meal.id, datetime.now().weekday(), 12)
+        demand = forecast.get(meal.id, [0] * len(hours))
         predictions.append({
             'meal': meal.name,
-            'predicted_demand': pred
+            'predicted_demand': demand[lunch_index]
+        })
+        demand_grid.append({
+            'meal': meal.name,
+            'demand': demand
         })
 
     rush_hours = predictor.predict_rush_hours()
+    accuracy = predictor.forecast_accuracy()
 
-    return render_template('analytics.html', predictions=predictions, rush_hours=rush_hours)
+    return render_template(
+        'analytics.html',
+        predictions=predictions,
+        demand_grid=demand_grid,
+        hours=hours,
+        rush_hours=rush_hours,
+        accuracy=accuracy
+    )
 
 @app.route('/admin/train-model', methods=['POST'])
 @login_required
@@ -404,24 +645,185 @@ def train_model():
     if not current_user.is_admin():
         return jsonify({'success': False, 'message': 'Access denied'}), 403
 
-    success = predictor.train()
+    incremental = request.args.get('mode') == 'incremental'
+    job_id = predictor.start_training(app, incremental)
+
+    return jsonify({
+        'success': True,
+        'message': 'Model training started',
+        'job_id': job_id,
+        'status_url': url_for('train_model_status', job_id=job_id)
+    }), 202
+
+@app.route('/admin/train-model/<job_id>')
+@login_required
+def train_model_status(job_id):
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
 
-    if success:
-        return jsonify({'success': True, 'message': 'Model trained successfully'})
+    job = predictor.get_training_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Training job not found'}), 404
+
+    return jsonify({'success': True, 'job': job})
+
+# ==================== PICKUP COUNTER ====================
+
+def upcoming_pickups():
+    """Open orders from PICKUP_GRACE_MINUTES ago on, bounded by ?limit="""
+    limit = request.args.get('limit', app.config['COUNTER_QUEUE_SIZE'], type=int)
+    since = datetime.now() - timedelta(minutes=app.config['PICKUP_GRACE_MINUTES'])
+    return Reservation.upcoming(since, max(1, min(limit, app.config['MAX_PAGE_SIZE'])))
+
+def requested_tokens():
+    """Tokens from a JSON ``{"tokens": [...]}`` body or a ``tokens`` form field
+
+    The form field, or a JSON string, may hold several scanned tokens
+    separated by spaces, commas or newlines. Tokens are upper-cased and
+    deduplicated in order. Returns None when the JSON value is neither a
+    string nor a list of strings.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        raw = payload.get('tokens') or []
+        if isinstance(raw, str):
+            raw = raw.replace(',', ' ').split()
+        elif not isinstance(raw, list) or not all(isinstance(token, str) for token in raw):
+            return None
     else:
-        return jsonify({'success': False, 'message': 'Insufficient data to train model'})
+        raw = request.form.get('tokens', '').replace(',', ' ').split()
+    return list(dict.fromkeys(token.strip().upper() for token in raw if token.strip()))
+
+@app.route('/admin/counter')
+@login_required
+def pickup_counter():
+    if not current_user.is_admin():
+        flash('Access denied', 'danger')
+        return redirect(url_for('student_dashboard'))
+
+    return render_template('counter.html', pickups=upcoming_pickups())
+
+@app.route('/api/pickups/upcoming')
+@login_required
+def api_upcoming_pickups():
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+
+    return jsonify({'items': [reservation.to_pickup_dict() for reservation in upcoming_pickups()]})
+
+@app.route('/api/pickups/<token>')
+@login_required
+def api_pickup(token):
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+
+    reservations = Reservation.by_tokens([token.strip().upper()])
+    if not reservations:
+        return jsonify({'success': False, 'message': 'Unknown token'}), 404
+
+    return jsonify({'success': True, 'reservation': reservations[0].to_pickup_dict()})
+
+@app.route('/api/pickups/complete', methods=['POST'])
+@login_required
+def api_complete_pickups():
+    """Complete every open order among the scanned tokens in one statement"""
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+
+    tokens = requested_tokens()
+    if tokens is None:
+        return jsonify({'success': False, 'message': 'Tokens must be a string or a list of strings'}), 400
+    if not tokens:
+        return jsonify({'success': False, 'message': 'No tokens given'}), 400
+    if len(tokens) > app.config['PICKUP_BATCH_LIMIT']:
+        return jsonify({
+            'success': False,
+            'message': f"At most {app.config['PICKUP_BATCH_LIMIT']} tokens per request"
+        }), 400
+
+    completed = Reservation.complete_tokens(tokens)
+    found = {reservation.token: reservation for reservation in Reservation.by_tokens(tokens)}
+
+    results = []
+    for token in tokens:
+        reservation = found.get(token)
+        if reservation is None:
+            results.append({'token': token, 'result': 'not_found'})
+            continue
+        if token in completed:
+            result = 'completed'
+        elif reservation.status == 'completed':
+            result = 'already_completed'
+        else:
+            result = reservation.status
+        results.append({'token': token, 'result': result, 'reservation': reservation.to_pickup_dict()})
+
+    return jsonify({'success': True, 'completed': len(completed), 'results': results})
 
 # ==================== API ROUTES ====================
 
 @app.route('/api/meals')
 def api_meals():
-    meals = Meal.query.filter_by(is_available=True).all()
-    return jsonify([meal.to_dict() for meal in meals])
+    def available_meals():
+        meals = Meal.query.filter_by(is_available=True).all()
+        return [meal.to_dict() for meal in meals]
+
+    return api_cache.json_response('meals', available_meals)
 
 @app.route('/api/rush-hours')
 def api_rush_hours():
-    rush_hours = predictor.predict_rush_hours()
-    return jsonify(rush_hours)
+    return api_cache.json_response('rush-hours', predictor.predict_rush_hours)
+
+@app.route('/api/pickup-slots')
+def api_pickup_slots():
+    target_date = request.args.get('date')
+    try:
+        target_date = datetime.strptime(target_date, '%Y-%m-%d').date() if target_date else datetime.now().date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date'}), 400
+
+    if not scheduler.in_booking_window(target_date):
+        return jsonify({'success': False, 'message': 'Date outside the booking window'}), 400
+
+    return jsonify([slot.to_dict() for slot in scheduler.day(target_date)])
+
+@app.route('/api/live')
+def api_live():
+    """Server-sent events: 'stock' and 'rush' updates, 'reset' to reload"""
+    return live_feed.response()
+
+@app.route('/api/reservations')
+@login_required
+def api_reservations():
+    reservations, next_cursor = reservation_history_page()
+    return jsonify({
+        'items': [reservation.to_dict() for reservation in reservations],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/admin/meals')
+@login_required
+def api_admin_meals():
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+
+    meals, next_cursor = keyset_page(
+        Meal.query, Meal.id, request.args.get('after', type=int), page_size()
+    )
+    return jsonify({
+        'items': [meal.to_dict() for meal in meals],
+        'next_cursor': next_cursor
+    })
+
+# ==================== MONITORING ====================
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return app.response_class('Unauthorized\n', status=401, mimetype='text/plain')
+    return app.response_class(registry.render(), content_type=registry.content_type)
 
 # ==================== ERROR HANDLERS ====================
 
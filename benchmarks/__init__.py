@@ -0,0 +1,8 @@
+'''
+Benchmarks for the Smart Canteen System
+
+Each benchmark runs against its own throwaway SQLite database, never the
+application database. Run them from the project root, for example:
+
+    python -m benchmarks.reservation_concurrency
+'''
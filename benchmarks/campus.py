@@ -0,0 +1,179 @@
+'''
+Synthetic campus data set
+
+Bulk-inserts a large population of students, a menu and a long reservation
+history with realistic breakfast, lunch and dinner peaks. The other
+benchmarks use it to run against production-sized tables; run it on its
+own to build a database file once and reuse it with their --db option:
+
+    python -m benchmarks.campus --db /tmp/campus.db --users 50000 --reservations 2000000
+'''
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import create_app, report
+from models import db, User, Meal, Reservation, RushHour
+
+# Password of every synthesized student
+PASSWORD = 'password123'
+
+# Relative pickup traffic per opening hour, peaking at lunch
+HOURLY_PROFILE = {
+    8: 4, 9: 3, 10: 2, 11: 6, 12: 20, 13: 16, 14: 5,
+    15: 2, 16: 2, 17: 4, 18: 10, 19: 7, 20: 2
+}
+
+STATUSES = ['completed', 'cancelled', 'confirmed', 'pending']
+STATUS_WEIGHTS = [0.82, 0.08, 0.06, 0.04]
+
+CATEGORIES = ['breakfast', 'lunch', 'dinner', 'snack']
+
+
+def add_arguments(parser):
+    """Options shared by every benchmark that synthesizes a campus"""
+    parser.add_argument('--db', help='reuse (or create) this SQLite database file')
+    parser.add_argument('--users', type=int, default=50000, help='students to synthesize')
+    parser.add_argument('--reservations', type=int, default=2000000, help='reservations to synthesize')
+    parser.add_argument('--meals', type=int, default=40, help='meals on the menu')
+    parser.add_argument('--days', type=int, default=60, help='days of reservation history')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+
+
+def is_populated():
+    return Reservation.query.first() is not None
+
+
+def add_reservations(count, days, rng, first_token=0, chunk_size=50000):
+    """Bulk-insert ``count`` reservations spread over the last ``days`` days
+
+    Tokens are numbered from ``first_token``, so later batches must start
+    after the earlier ones.
+    """
+    user_ids = np.array([row[0] for row in db.session.query(User.id).filter_by(role='student')])
+    meal_ids = np.array([row[0] for row in db.session.query(Meal.id)])
+
+    # A few meals are far more popular than the rest
+    popularity = 1.0 / np.arange(1, len(meal_ids) + 1)
+    popularity /= popularity.sum()
+    hours = np.array(list(HOURLY_PROFILE))
+    hour_weights = np.array(list(HOURLY_PROFILE.values()), dtype=float)
+    hour_weights /= hour_weights.sum()
+
+    midnight = np.datetime64(datetime.now().date()) - np.timedelta64(days, 'D')
+    for first in range(first_token, first_token + count, chunk_size):
+        n = min(chunk_size, first_token + count - first)
+        pickup = (
+            midnight.astype('datetime64[m]')
+            + rng.integers(0, days + 2, n) * np.timedelta64(1, 'D')
+            + rng.choice(hours, n, p=hour_weights) * np.timedelta64(1, 'h')
+            + rng.choice([0, 15, 30, 45], n) * np.timedelta64(1, 'm')
+        )
+        created = pickup - rng.integers(10, 48 * 60, n) * np.timedelta64(1, 'm')
+
+        db.session.bulk_insert_mappings(Reservation, [
+            {
+                'user_id': int(user_id),
+                'meal_id': int(meal_id),
+                'pickup_time': pickup_time,
+                'created_at': created_at,
+                'status': status,
+                'quantity': int(quantity),
+                # 'S' is not a hex digit, so these never collide with real tokens
+                'token': f'S{first + i:07X}'
+            }
+            for i, (user_id, meal_id, pickup_time, created_at, status, quantity) in enumerate(zip(
+                rng.choice(user_ids, n),
+                rng.choice(meal_ids, n, p=popularity),
+                pickup.astype(datetime),
+                created.astype(datetime),
+                rng.choice(STATUSES, n, p=STATUS_WEIGHTS),
+                rng.choice([1, 1, 1, 2], n)
+            ))
+        ])
+        db.session.commit()
+
+
+def synthesize(users=50000, reservations=2000000, meals=40, days=60, seed=42, chunk_size=50000):
+    """Fill the current app's database with a synthetic campus
+
+    Rows are generated with NumPy and written with bulk inserts in chunks,
+    one commit per chunk. Returns row counts and timings.
+    """
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    # Hashing is deliberately slow, so every student shares one hash
+    password_hash = generate_password_hash(PASSWORD)
+    for first in range(0, users, chunk_size):
+        db.session.bulk_insert_mappings(User, [
+            {
+                'username': f'student{i}',
+                'email': f'student{i}@university.com',
+                'password_hash': password_hash,
+                'role': 'student'
+            }
+            for i in range(first, min(first + chunk_size, users))
+        ])
+        db.session.commit()
+
+    db.session.bulk_insert_mappings(Meal, [
+        {
+            'name': f'Meal {i}',
+            'price': round(float(rng.uniform(2, 12)), 2),
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'stock': 1000000,
+            'is_available': True
+        }
+        for i in range(meals)
+    ])
+    db.session.commit()
+    users_done = time.perf_counter()
+
+    add_reservations(reservations, days, rng, chunk_size=chunk_size)
+    reservations_done = time.perf_counter()
+
+    slots = RushHour.rebuild()
+    finished = time.perf_counter()
+
+    return {
+        'users': users,
+        'meals': meals,
+        'reservations': reservations,
+        'rush_hour_slots': slots,
+        'users_seconds': round(users_done - started, 3),
+        'reservations_seconds': round(reservations_done - users_done, 3),
+        'reservations_per_second': round(reservations / max(reservations_done - users_done, 1e-9)),
+        'rollup_seconds': round(finished - reservations_done, 3)
+    }
+
+
+def prepare(args):
+    """Synthesize the campus described by ``args`` unless the database has one"""
+    if is_populated():
+        print(f"✓ Reusing synthetic campus in {args.db}", file=sys.stderr)
+        return None
+    print(f"Synthesizing {args.users} students and {args.reservations} reservations...", file=sys.stderr)
+    return synthesize(args.users, args.reservations, args.meals, args.days, args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    app = create_app(args.db)
+    with app.app_context():
+        results = prepare(args)
+    if results:
+        report('campus', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
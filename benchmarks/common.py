@@ -0,0 +1,40 @@
+'''
+Shared helpers for the benchmark scripts
+'''
+
+import json
+import os
+import tempfile
+
+from flask import Flask
+
+from config import Config
+from models import db, enable_sqlite_pragmas
+
+
+def create_app(db_path=None):
+    """Create a bare Flask app bound to a scratch SQLite database"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='canteen-bench-'), 'bench.db')
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': 32,
+        'max_overflow': 64
+    }
+    app.config['SQLITE_PRAGMAS'] = {**Config.SQLITE_PRAGMAS, 'busy_timeout': 30000}
+
+    db.init_app(app)
+    with app.app_context():
+        enable_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        db.create_all()
+
+    return app
+
+
+def report(name, results):
+    """Print benchmark results as a single JSON line"""
+    print(json.dumps({'benchmark': name, **results}, sort_keys=True))
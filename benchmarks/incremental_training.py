@@ -0,0 +1,98 @@
+'''
+Full versus incremental training benchmark
+
+Trains the demand model on a synthetic campus (see benchmarks.campus), adds
+a batch of new reservations and marks orders from the oldest days as no-shows,
+then compares DemandPredictor.train_incremental against a full
+DemandPredictor.train on the grown history with a window --expire-days
+shorter, so those days age out: wall time, MAE, R² and whether the
+incrementally maintained aggregates match a full recount. With --db the
+campus file is copied first, because reservations are added and changed.
+
+    python -m benchmarks.incremental_training --db /tmp/campus.db --new-reservations 30000 --backend forest
+'''
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks import campus
+from benchmarks.common import create_app, report
+from ml_model import DemandPredictor, BUCKET_KEYS, BACKENDS, TRAINING_STATUSES
+from models import db, Reservation
+
+
+def summary(metrics):
+    keys = ('duration_seconds', 'mae', 'r2', 'rows', 'backend', 'trees', 'meals')
+    return {key: metrics[key] for key in keys if key in metrics}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    campus.add_arguments(parser)
+    parser.add_argument('--new-reservations', type=int, default=30000,
+                        help='reservations added between the two trainings')
+    parser.add_argument('--expire-days', type=int, default=7,
+                        help='days of history aging out of the window between the two trainings')
+    parser.add_argument('--no-shows', type=int, default=5000,
+                        help='trained-on reservations of those days marked as no-shows meanwhile')
+    parser.add_argument('--backend', choices=list(BACKENDS), default='lookup', help='model backend to train')
+    args = parser.parse_args(argv)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='canteen-incremental-'), 'campus.db')
+    if args.db and os.path.exists(args.db):
+        shutil.copy(args.db, db_path)
+    args.db = db_path
+
+    app = create_app(db_path)
+    incremental = DemandPredictor(model_dir=tempfile.mkdtemp(prefix='canteen-models-'), backend=args.backend)
+    full = DemandPredictor(model_dir=tempfile.mkdtemp(prefix='canteen-models-'), backend=args.backend)
+
+    with app.app_context():
+        campus.prepare(args)
+        base = incremental.train()
+        if base is None:
+            print("✗ Not enough data to train; synthesize more reservations", file=sys.stderr)
+            return 1
+
+        # Recent orders, numbered after the synthesized ones
+        campus.add_reservations(args.new_reservations, 2, np.random.default_rng(args.seed + 1),
+                                first_token=Reservation.query.count())
+
+        # Orders counted by the first training go unclaimed on days that
+        # are about to age out; dropping those days must drop them too
+        days_back = args.days - args.expire_days
+        expiring = db.select(Reservation.id).where(
+            Reservation.status.in_(TRAINING_STATUSES),
+            Reservation.created_at < DemandPredictor._window_start(days_back)
+        ).limit(args.no_shows)
+        no_shows = db.session.execute(
+            db.update(Reservation).where(Reservation.id.in_(expiring.scalar_subquery()))
+            .values(status='no_show').execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        updated = incremental.train_incremental(days_back)
+        retrained = full.train(days_back)
+
+        key = lambda frame: frame.sort_values(BUCKET_KEYS).reset_index(drop=True)
+        aggregates_match = key(incremental._state['buckets']).equals(key(full._state['buckets']))
+
+    report('incremental_training', {
+        'dataset': {'database': db_path, 'new_reservations': args.new_reservations,
+                    'expire_days': args.expire_days, 'no_shows': no_shows},
+        'base': summary(base),
+        'incremental': {**summary(updated), 'new_reservations': updated['new_reservations']},
+        'full': summary(retrained),
+        'speedup': round(retrained['duration_seconds'] / updated['duration_seconds'], 2),
+        'aggregates_match': aggregates_match
+    })
+    return 0 if aggregates_match else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
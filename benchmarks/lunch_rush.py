@@ -0,0 +1,141 @@
+'''
+Lunch rush load test
+
+Synthesizes a large campus (see benchmarks.campus), then has many students
+at once log in, open their dashboard, browse the menu, check the rush hour
+forecast, reserve a lunch and look at their reservations, all through the
+Flask test client. Reports per-route p50/p95/p99 latency and throughput as
+one JSON line.
+
+    python -m benchmarks.lunch_rush --db /tmp/campus.db --sessions 2000 --workers 32
+'''
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks import campus
+from benchmarks.common import report
+from config import Config
+
+# (route name, method, path) of one student session, in order
+FLOW = [
+    ('login', 'POST', '/login'),
+    ('dashboard', 'GET', '/student/dashboard'),
+    ('menu', 'GET', '/student/menu'),
+    ('rush_hours', 'GET', '/api/rush-hours'),
+    ('reserve', 'POST', '/student/reserve'),
+    ('reservations', 'GET', '/student/reservations'),
+    ('meals_api', 'GET', '/api/meals'),
+]
+
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles (milliseconds) and throughput per route"""
+    routes = {}
+    for name, samples in sorted(latencies.items()):
+        ms = np.array(samples) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        routes[name] = {
+            'requests': len(samples),
+            'errors': errors.get(name, 0),
+            'mean_ms': round(float(ms.mean()), 2),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(float(ms.max()), 2),
+            'requests_per_second': round(len(samples) / elapsed, 1)
+        }
+    return routes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    campus.add_arguments(parser)
+    parser.add_argument('--sessions', type=int, default=1000, help='student sessions to run')
+    parser.add_argument('--workers', type=int, default=32, help='concurrent sessions')
+    args = parser.parse_args(argv)
+
+    # Point the application at the benchmark database before it is imported
+    if not args.db:
+        args.db = os.path.join(tempfile.mkdtemp(prefix='canteen-rush-'), 'campus.db')
+    Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.abspath(args.db)}'
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': args.workers,
+        'max_overflow': args.workers
+    }
+    Config.SQLITE_PRAGMAS = {**Config.SQLITE_PRAGMAS, 'busy_timeout': 30000}
+    Config.FORECAST_REFRESH_SECONDS = 0
+    Config.NO_SHOW_SWEEP_SECONDS = 0
+
+    from app import app
+    from models import Meal, User
+
+    with app.app_context():
+        dataset = campus.prepare(args)
+        students = [row[0] for row in User.query.with_entities(User.username).filter_by(role='student')]
+        meal_ids = [row[0] for row in Meal.query.with_entities(Meal.id).filter_by(category='lunch')]
+
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def session(i):
+        rng = random.Random(args.seed + i)
+        client = app.test_client()
+        pickup = datetime.combine(tomorrow, datetime.min.time()) + timedelta(
+            hours=rng.choice([12, 12, 13]), minutes=rng.choice([0, 15, 30, 45])
+        )
+        forms = {
+            'login': {'username': rng.choice(students), 'password': campus.PASSWORD},
+            'reserve': {
+                'meal_id': rng.choice(meal_ids),
+                'pickup_time': pickup.strftime('%Y-%m-%dT%H:%M'),
+                'quantity': 1
+            }
+        }
+
+        timings = []
+        for name, method, path in FLOW:
+            started = time.perf_counter()
+            response = client.open(path, method=method, data=forms.get(name))
+            timings.append((name, time.perf_counter() - started, response.status_code >= 400))
+
+        with lock:
+            for name, seconds, failed in timings:
+                latencies[name].append(seconds)
+                errors[name] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(session, range(args.sessions)))
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in latencies.values())
+    report('lunch_rush', {
+        'database': args.db,
+        'dataset': dataset,
+        'sessions': args.sessions,
+        'workers': args.workers,
+        'requests': total,
+        'errors': sum(errors.values()),
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(total / elapsed, 1),
+        'routes': summarize(latencies, errors, elapsed)
+    })
+    return 1 if any(errors.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
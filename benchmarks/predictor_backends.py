@@ -0,0 +1,114 @@
+'''
+Predictor backend comparison
+
+Fits every demand model backend (see ml_model.BACKENDS) on the same
+training split of a synthetic campus (see benchmarks.campus) and reports
+fit time, MAE and R² on the held-out rows, the pickled model size, and
+prediction latency: one (meal, weekday, hour) row, a full day grid of every
+meal, and DemandPredictor.predict_demand_batch including its meal query.
+
+    python -m benchmarks.predictor_backends --db /tmp/campus.db --repeat 1000
+'''
+
+import argparse
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks import campus
+from benchmarks.common import create_app, report
+from ml_model import (DemandPredictor, BACKENDS, FEATURE_COLUMNS, FORECAST_HOURS,
+                      split_training_data, evaluate)
+from models import db, Meal
+
+
+def latency(func, repeat):
+    """Median and 99th percentile wall-clock time of ``func`` in microseconds"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1e6)
+    return {
+        'runs': repeat,
+        'median_us': round(statistics.median(durations), 1),
+        'p99_us': round(float(np.percentile(durations, 99)), 1)
+    }
+
+
+def day_grid(X, meal_ids, day_of_week):
+    """Feature rows for every meal over FORECAST_HOURS, built from training rows"""
+    features = X.drop_duplicates('meal_id').set_index('meal_id')
+    rows = []
+    for meal_id in meal_ids:
+        if meal_id not in features.index:
+            continue
+        meal = features.loc[meal_id]
+        for hour in FORECAST_HOURS:
+            rows.append([meal_id, day_of_week, hour, int(day_of_week >= 5), meal['price'],
+                         meal['category_breakfast'], meal['category_lunch'], meal['category_dinner']])
+    return np.array(rows, dtype=float)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    campus.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=1000, help='runs per latency measurement')
+    args = parser.parse_args(argv)
+
+    app = create_app(args.db)
+    tomorrow = datetime.utcnow().date() + timedelta(days=1)
+    results = {}
+
+    with app.app_context():
+        dataset = campus.prepare(args)
+        predictor = DemandPredictor(model_dir=tempfile.mkdtemp(prefix='canteen-models-'))
+        X, y = predictor.prepare_training_data()
+        if X is None:
+            print("✗ Not enough data to train; synthesize more reservations", file=sys.stderr)
+            return 1
+
+        X_train, X_test, y_train, y_test = split_training_data(X, y)
+        meal_ids = [meal_id for meal_id, in db.session.query(Meal.id)]
+        grid = day_grid(X, meal_ids, tomorrow.weekday())
+        row = grid[:1]
+
+        for name, backend in BACKENDS.items():
+            model = backend()
+            started = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - started
+            mae, r2 = evaluate(y_test, model.predict(X_test))
+
+            predictor.model = model
+            results[name] = {
+                'fit_seconds': round(fit_seconds, 3),
+                'mae': round(mae, 4),
+                'r2': round(r2, 4),
+                'model_bytes': len(pickle.dumps(model)),
+                'predict_row': latency(lambda: model.predict(row), args.repeat),
+                'predict_day_grid': latency(lambda: model.predict(grid), args.repeat),
+                'predict_demand_batch': latency(
+                    lambda: predictor.predict_demand_batch(meal_ids, tomorrow.weekday(), FORECAST_HOURS),
+                    args.repeat
+                )
+            }
+
+    report('predictor_backends', {
+        'dataset': dataset,
+        'training_rows': len(X_train),
+        'test_rows': len(X_test),
+        'grid_rows': len(grid),
+        'features': FEATURE_COLUMNS,
+        'backends': results
+    })
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+'''
+Demand predictor micro-benchmarks
+
+Times DemandPredictor.predict_rush_hours (cold and memoized),
+prepare_training_data and train against a synthetic campus (see
+benchmarks.campus). Models are saved to a scratch directory, never to the
+application's model registry.
+
+    python -m benchmarks.predictor_timings --db /tmp/campus.db --repeat 5
+'''
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import campus
+from benchmarks.common import create_app, report
+from ml_model import DemandPredictor
+
+
+def timed(func, repeat, setup=None):
+    """Run ``func`` ``repeat`` times and summarize its wall-clock durations"""
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return {
+        'runs': repeat,
+        'min_seconds': round(min(durations), 6),
+        'median_seconds': round(statistics.median(durations), 6),
+        'max_seconds': round(max(durations), 6)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    campus.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per timed function')
+    parser.add_argument('--train-repeat', type=int, default=1, help='training runs')
+    args = parser.parse_args(argv)
+
+    app = create_app(args.db)
+    predictor = DemandPredictor(model_dir=tempfile.mkdtemp(prefix='canteen-models-'))
+    tomorrow = datetime.utcnow().date() + timedelta(days=1)
+
+    with app.app_context():
+        dataset = campus.prepare(args)
+        X, _ = predictor.prepare_training_data()
+
+        results = {
+            'dataset': dataset,
+            'training_rows': 0 if X is None else len(X),
+            'predict_rush_hours_cold': timed(
+                lambda: predictor.predict_rush_hours(tomorrow), args.repeat,
+                setup=predictor.invalidate_forecasts
+            ),
+            'predict_rush_hours_memoized': timed(
+                lambda: predictor.predict_rush_hours(tomorrow), args.repeat
+            ),
+            'prepare_training_data': timed(predictor.prepare_training_data, args.repeat),
+            'train': timed(predictor.train, args.train_repeat)
+        }
+
+    report('predictor_timings', results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+'''
+Query plan and query budget check
+
+Drives each route through the Flask test client against a scratch
+database, records every SQL statement it executes and runs EXPLAIN QUERY
+PLAN on it. Exits non-zero if a statement scans a table that is not
+explicitly allowed to be scanned, or if a route runs more than
+QUERY_BUDGET statements (which usually means an N+1 query pattern).
+
+    python -m benchmarks.query_plans
+'''
+
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the application at a scratch database before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(prefix='canteen-plans-'), 'plans.db')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{_db_path}'
+os.environ['FORECAST_REFRESH_SECONDS'] = '0'
+os.environ['NO_SHOW_SWEEP_SECONDS'] = '0'
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, User, Meal, Reservation, RushHour  # noqa: E402
+
+STUDENT_ROUTES = [
+    ('GET', '/student/dashboard'),
+    ('GET', '/student/menu'),
+    ('GET', '/student/menu?category=lunch'),
+    ('GET', '/student/reservations'),
+    ('GET', '/api/reservations?limit=10'),
+    ('GET', '/student/rush-prediction'),
+    ('POST', '/student/reserve'),
+    ('GET', '/api/meals'),
+    ('GET', '/api/rush-hours'),
+]
+
+ADMIN_ROUTES = [
+    ('GET', '/admin/dashboard'),
+    ('GET', '/admin/meals'),
+    ('GET', '/api/admin/meals?after=5'),
+    ('GET', '/admin/analytics'),
+    ('GET', '/admin/counter'),
+    ('GET', '/api/pickups/upcoming'),
+    ('GET', '/api/pickups/00000001'),
+    ('POST', '/api/pickups/complete'),
+    ('POST', '/admin/meals/delete/13'),  # the meal without reservations
+]
+
+# (path, table) pairs where reading the whole table is the intent
+ALLOWED_SCANS = {
+    ('/admin/dashboard', 'meals'),  # popular meals ranks every meal
+    ('/admin/meals', 'meals'),      # first page of the meal list
+    ('/api/admin/meals', 'meals'),
+    ('/admin/analytics', 'meals'),  # forecast for the whole menu
+}
+
+# Statements a single request may run, enforced by the app's query counter
+QUERY_BUDGET = 8
+
+# A table scan that is not served by any index
+SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def seed():
+    students = []
+    for i in range(5):
+        student = User(username=f'planner{i}', email=f'planner{i}@university.com', role='student')
+        student.set_password('password123')
+        students.append(student)
+    db.session.add_all(students)
+
+    meals = [
+        Meal(name=f'Meal {i}', price=5.0, category=category, stock=50, is_available=True)
+        for i, category in enumerate(['breakfast', 'lunch', 'dinner', 'snack'] * 3)
+    ]
+    db.session.add_all(meals)
+    db.session.add(Meal(name='Unused', price=1.0, category='snack', stock=0, is_available=False))
+    db.session.flush()
+
+    start = datetime.now() - timedelta(days=14)
+    for i in range(200):
+        reservation = Reservation(
+            user_id=students[i % len(students)].id,
+            meal_id=meals[i % len(meals)].id,
+            pickup_time=start + timedelta(hours=i),
+            quantity=1,
+            status=['completed', 'confirmed', 'pending', 'cancelled'][i % 4]
+        )
+        reservation.token = f'{i:08X}'
+        db.session.add(reservation)
+    db.session.commit()
+    RushHour.rebuild()
+
+
+def capture(client, method, path, statements):
+    data = None
+    if path == '/student/reserve':
+        pickup = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%dT12:30')
+        data = {'meal_id': 1, 'pickup_time': pickup, 'quantity': 1}
+    elif path == '/api/pickups/complete':
+        data = {'tokens': '00000001 00000002 00000003 00000004 FFFFFFFF'}
+
+    del statements[:]
+    error = None
+    try:
+        client.open(path, method=method, data=data)
+    except AssertionError as e:  # raised by the app when over QUERY_BUDGET
+        error = str(e)
+    return list(statements), error
+
+
+def scanned_tables(connection, statement, parameters):
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    details = [row[-1] for row in plan]
+    return {match.group(1) for match in map(SCAN.match, details) if match}, details
+
+
+def main():
+    statements = []
+    app.config['TESTING'] = True
+    app.config['QUERY_BUDGET'] = QUERY_BUDGET
+
+    with app.app_context():
+        seed()
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                statements.append((statement, parameters))
+
+    captured = []
+    budget_failures = []
+    for username, password, routes in [
+        ('planner0', 'password123', STUDENT_ROUTES),
+        ('admin', 'admin123', ADMIN_ROUTES),
+    ]:
+        client = app.test_client()
+        client.post('/login', data={'username': username, 'password': password})
+        for method, path in routes:
+            route_statements, error = capture(client, method, path, statements)
+            captured.append((path, route_statements))
+            if error:
+                budget_failures.append(error)
+
+    for error in budget_failures:
+        print(f"✗ {error}")
+
+    failures = 0
+    with app.app_context(), db.engine.connect() as connection:
+        for path, route_statements in captured:
+            for statement, parameters in route_statements:
+                tables, details = scanned_tables(connection, statement, parameters)
+                for table in tables:
+                    if (path.split('?')[0], table) in ALLOWED_SCANS:
+                        continue
+                    failures += 1
+                    print(f"✗ {path}: full scan of {table}")
+                    print(f"  {' '.join(statement.split())}")
+                    for detail in details:
+                        print(f"    {detail}")
+
+    checked = sum(len(route_statements) for _, route_statements in captured)
+    if failures:
+        print(f"✗ {failures} full table scans in {checked} statements")
+    else:
+        print(f"✓ No unexpected full table scans in {checked} statements")
+    if not budget_failures:
+        print(f"✓ Every route stayed within {QUERY_BUDGET} statements")
+    return 1 if failures or budget_failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
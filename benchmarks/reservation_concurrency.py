@@ -0,0 +1,87 @@
+'''
+Concurrent reservation benchmark
+
+Fires many parallel reservations at a single meal and checks that stock is
+never oversold, reporting the achieved throughput.
+
+    python -m benchmarks.reservation_concurrency --requests 500 --workers 64
+'''
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_app, report
+from models import db, User, Meal, Reservation
+
+
+def seed(app, users, stock):
+    with app.app_context():
+        db.session.add_all([
+            User(
+                username=f'bench{i}',
+                email=f'bench{i}@university.com',
+                password_hash='!',
+                role='student'
+            )
+            for i in range(users)
+        ])
+        meal = Meal(name='Benchmark Curry', price=6.99, category='lunch', stock=stock, is_available=True)
+        db.session.add(meal)
+        db.session.commit()
+        return meal.id, [user.id for user in User.query.all()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300, help='number of reservation attempts')
+    parser.add_argument('--workers', type=int, default=32, help='concurrent threads')
+    parser.add_argument('--stock', type=int, default=100, help='initial stock of the meal')
+    parser.add_argument('--quantity', type=int, default=1, help='portions per reservation')
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    meal_id, user_ids = seed(app, args.workers, args.stock)
+    pickup_time = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    def reserve(i):
+        with app.app_context():
+            meal = Meal.query.get(meal_id)
+            return Reservation.book(user_ids[i % len(user_ids)], meal, pickup_time, args.quantity) is not None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        outcomes = list(pool.map(reserve, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final_stock = Meal.query.get(meal_id).stock
+        reserved = db.session.query(db.func.coalesce(db.func.sum(Reservation.quantity), 0)).scalar()
+
+    accepted = sum(outcomes)
+    expected = min(args.requests, args.stock // args.quantity)
+    oversold = reserved > args.stock or final_stock != args.stock - reserved
+
+    report('reservation_concurrency', {
+        'requests': args.requests,
+        'workers': args.workers,
+        'accepted': accepted,
+        'rejected': args.requests - accepted,
+        'initial_stock': args.stock,
+        'final_stock': final_stock,
+        'reserved_quantity': int(reserved),
+        'oversold': oversold,
+        'elapsed_seconds': round(elapsed, 4),
+        'requests_per_second': round(args.requests / elapsed, 1)
+    })
+
+    if oversold or accepted != expected:
+        print(f"✗ Expected {expected} accepted reservations without overselling", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
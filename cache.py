@@ -0,0 +1,197 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from flask import current_app, request
+from flask_login import UserMixin
+from sqlalchemy import event
+
+
+class CacheEntry:
+    def __init__(self, body, expires_at):
+        self.body = body
+        self.etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """In-process TTL cache for serialized JSON API responses
+
+    Entries expire after ``ttl`` seconds and are dropped as soon as a
+    commit writes to one of the watched models (see ``invalidate_on_commit``).
+    Each worker process keeps its own cache, so writes made by another
+    worker become visible after at most ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > time.monotonic():
+                return entry
+            return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def json_response(self, key, build):
+        """Serve ``build()`` as JSON from the cache, honouring If-None-Match"""
+        entry = self.get(key)
+        if entry is None:
+            with self._lock:
+                generation = self._generation
+            entry = CacheEntry(current_app.json.dumps(build()), time.monotonic() + self.ttl)
+            with self._lock:
+                # Don't store a result computed before an invalidation
+                if generation == self._generation:
+                    self._entries[key] = entry
+
+        response = current_app.response_class(entry.body, mimetype='application/json')
+        response.set_etag(entry.etag)
+        # Clients may keep the body but must revalidate it on every poll
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    def invalidate_on_commit(self, session, models):
+        """Clear the cache after any commit on ``session`` that wrote to ``models``"""
+        classes = tuple(models)
+
+        def mark_stale(session):
+            session.info['response_cache_stale'] = True
+
+        @event.listens_for(session, 'after_flush')
+        def track_flush(session, flush_context):
+            changed = chain(session.new, session.dirty, session.deleted)
+            if any(isinstance(obj, classes) for obj in changed):
+                mark_stale(session)
+
+        @event.listens_for(session, 'do_orm_execute')
+        def track_bulk_write(orm_execute_state):
+            mapper = orm_execute_state.bind_mapper
+            if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+                    and mapper is not None and issubclass(mapper.class_, classes):
+                mark_stale(orm_execute_state.session)
+
+        @event.listens_for(session, 'after_commit')
+        def clear_after_commit(session):
+            if session.info.pop('response_cache_stale', False):
+                self.clear()
+
+        @event.listens_for(session, 'after_rollback')
+        def forget_after_rollback(session):
+            session.info.pop('response_cache_stale', None)
+
+
+class CachedUser(UserMixin):
+    """Read-only copy of the user columns needed to serve a request
+
+    Returned by the login manager's user loader instead of a ``User`` row,
+    so it carries no session and no relationships.
+    """
+
+    def __init__(self, id, username, role, department):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.department = department
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+class UserCache:
+    """Per-process LRU cache of ``CachedUser`` records by user id
+
+    Holds at most ``maxsize`` users, each for up to ``ttl`` seconds. A
+    commit that changes or deletes users drops them (see
+    ``invalidate_on_commit``); other workers pick up the change once their
+    entry expires.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (expires_at, CachedUser)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, load):
+        """The cached user ``user_id``, calling ``load(user_id)`` on a miss
+
+        ``load`` returns a ``CachedUser`` or None; None is not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+            generation = self._generation
+
+        user = load(user_id)
+        if user is not None:
+            with self._lock:
+                # Don't store a row read before an invalidation
+                if generation == self._generation:
+                    self._entries[user_id] = (now + self.ttl, user)
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def invalidate_on_commit(self, session, model):
+        """Drop users changed by ``model`` rows on ``session`` once committed
+
+        Bulk UPDATE or DELETE statements on ``model`` clear the whole cache.
+        """
+
+        @event.listens_for(session, 'after_flush')
+        def track_flush(session, flush_context):
+            for obj in chain(session.dirty, session.deleted):
+                if isinstance(obj, model) and obj.id is not None:
+                    session.info.setdefault('changed_users', set()).add(obj.id)
+
+        @event.listens_for(session, 'do_orm_execute')
+        def track_bulk_write(orm_execute_state):
+            mapper = orm_execute_state.bind_mapper
+            if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+                    and mapper is not None and issubclass(mapper.class_, model):
+                orm_execute_state.session.info['users_stale'] = True
+
+        @event.listens_for(session, 'after_commit')
+        def invalidate_after_commit(session):
+            if session.info.pop('users_stale', False):
+                session.info.pop('changed_users', None)
+                self.clear()
+            else:
+                changed = session.info.pop('changed_users', None)
+                if changed:
+                    self.invalidate(changed)
+
+        @event.listens_for(session, 'after_rollback')
+        def forget_after_rollback(session):
+            session.info.pop('users_stale', None)
+            session.info.pop('changed_users', None)
@@ -6,8 +6,23 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'ai-smart-canteen-local-secret-2026'
 
     # Database
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///canteen.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI') or 'sqlite:///canteen.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds
+    }
+
+    # Applied to every new connection when the database is SQLite. WAL lets
+    # readers proceed while a write is being committed.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    }
 
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
@@ -20,11 +35,62 @@ class Config:
     CANTEEN_OPEN_TIME = "08:00"
     CANTEEN_CLOSE_TIME = "20:00"
 
+    # Pickups are booked into slots of PICKUP_SLOT_MINUTES. A slot's capacity
+    # depends on the forecast rush level of its hour, which decides how many
+    # counters are staffed.
+    PICKUP_SLOT_MINUTES = 15
+    PICKUP_SLOT_CAPACITY = {'low': 10, 'medium': 15, 'high': 20}
+
+    # Orders stay on the counter screen until PICKUP_GRACE_MINUTES after their
+    # pickup time; staff may complete at most PICKUP_BATCH_LIMIT tokens at once
+    PICKUP_GRACE_MINUTES = int(os.environ.get('PICKUP_GRACE_MINUTES', 30))
+    PICKUP_BATCH_LIMIT = 200
+    COUNTER_QUEUE_SIZE = 20
+
+    # Orders still open after the grace period are marked no-show and their
+    # stock returned every NO_SHOW_SWEEP_SECONDS (0 disables), in batches of
+    # NO_SHOW_BATCH_SIZE reservations per transaction
+    NO_SHOW_SWEEP_SECONDS = int(os.environ.get('NO_SHOW_SWEEP_SECONDS', 60))
+    NO_SHOW_BATCH_SIZE = int(os.environ.get('NO_SHOW_BATCH_SIZE', 500))
+
+    # Seconds a cached /api response may be served before it is rebuilt
+    API_CACHE_TTL = int(os.environ.get('API_CACHE_TTL', 10))
+
+    # Users kept by each worker's login cache, and seconds before one is re-read
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Seconds between coalesced updates on the /api/live event stream
+    LIVE_FEED_INTERVAL = float(os.environ.get('LIVE_FEED_INTERVAL', 1.0))
+
+    # Maximum SQL statements per request; 0 disables the check
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 0))
+
+    # Bearer token required to scrape /metrics; empty leaves it open
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+    # Rows per page for reservation history and meal lists
+    PAGE_SIZE = 25
+    MAX_PAGE_SIZE = 100
+
     # Reservation settings
     MAX_RESERVATIONS_PER_USER = 3
     RESERVATION_ADVANCE_HOURS = 24
 
     # ML Model settings
-    MODEL_PATH = 'models/demand_prediction_model.pkl'
+    MODEL_DIR = 'models'
+    # Demand model trained by this deployment: 'lookup' (per meal/weekday/hour
+    # table, NumPy only) or 'forest' (RandomForest, needs scikit-learn)
+    MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'lookup')
+    MODEL_KEEP_VERSIONS = 5
     TRAINING_DATA_PATH = 'data/historical_data.csv'
     MIN_TRAINING_SAMPLES = 100
+
+    # Rush hour forecasts are memoized for FORECAST_TTL seconds and today's and
+    # tomorrow's are recomputed every FORECAST_REFRESH_SECONDS (0 disables)
+    FORECAST_TTL = int(os.environ.get('FORECAST_TTL', 300))
+    FORECAST_REFRESH_SECONDS = int(os.environ.get('FORECAST_REFRESH_SECONDS', 60))
+
+    # Days of per-meal demand forecasts stored by `flask forecast-demand`;
+    # pickups can be booked this many days ahead, today included
+    FORECAST_DAYS = 7
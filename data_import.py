@@ -0,0 +1,261 @@
+'''
+Bulk loading of users, meals and reservation history
+
+Rows are read from CSV or Parquet files in chunks and written with
+``bulk_insert_mappings``, one commit per chunk. Existing usernames, emails,
+meal names and tokens are fetched once up front instead of being checked
+row by row, and the default password is hashed only once.
+
+    flask import-data --users users.csv --meals meals.csv --reservations history.parquet
+'''
+
+import secrets
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Meal, Reservation
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Prefix of generated reservation tokens; not a hex digit, so they never
+# collide with tokens from Reservation.generate_token
+TOKEN_PREFIX = 'H'
+
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _present(value):
+    """False for None, NaN and empty strings as produced by CSV readers"""
+    return value is not None and value == value and value != ''
+
+
+def _flag(value):
+    """Booleans from Parquet as they are; CSV text such as 'true' or '0' parsed"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y', 't')
+    return bool(value)
+
+
+def _datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def read_records(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of row dicts, ``chunk_size`` rows at a time, from a CSV or Parquet file
+
+    CSV columns are all read as text, so all-digit usernames, tokens and
+    emails keep their type and leading zeros; empty fields become ``''``.
+    The importer converts numeric columns itself.
+    """
+    import pandas as pd
+
+    if path.lower().endswith(('.parquet', '.pq')):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('Reading Parquet files requires pyarrow (pip install pyarrow)')
+        frames = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        frames = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+    for frame in frames:
+        yield frame.to_dict('records')
+
+
+class BulkImporter:
+    """Insert users, meals and reservations in bulk into the current app's database
+
+    Accounts without a ``password`` or ``password_hash`` column get
+    ``default_password``, or a random one if none is given (an admin then
+    has to reset it). Only the default's hash is kept; passwords given per
+    row are hashed as they are read and not held on to.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, default_password=None):
+        self.chunk_size = chunk_size
+        self._default_hash = generate_password_hash(default_password or secrets.token_urlsafe(16))
+        self._usernames = None
+        self._emails = None
+        self._user_ids = None
+        self._meal_ids = None
+        self._tokens = None
+        self._next_token = None
+
+    def _prefetch_users(self):
+        if self._usernames is None:
+            rows = db.session.query(User.username, User.email).all()
+            self._usernames = {username for username, _ in rows}
+            self._emails = {email for _, email in rows}
+
+    def _user_id_map(self):
+        if self._user_ids is None:
+            self._user_ids = dict(db.session.query(User.username, User.id).all())
+        return self._user_ids
+
+    def _meal_id_map(self):
+        if self._meal_ids is None:
+            self._meal_ids = dict(db.session.query(Meal.name, Meal.id).all())
+        return self._meal_ids
+
+    def _prefetch_tokens(self):
+        if self._tokens is None:
+            self._tokens = {token for token, in db.session.query(Reservation.token)}
+            last = max((t for t in self._tokens if t.startswith(TOKEN_PREFIX)), default=None)
+            self._next_token = int(last[len(TOKEN_PREFIX):], 16) + 1 if last else 0
+
+    def _generate_token(self):
+        token = f'{TOKEN_PREFIX}{self._next_token:09X}'
+        self._next_token += 1
+        return token
+
+    def _insert(self, model, mappings):
+        for chunk in _chunks(mappings, self.chunk_size):
+            db.session.bulk_insert_mappings(model, chunk)
+            db.session.commit()
+
+    def add_users(self, records):
+        """Insert users whose username and email are both new
+
+        Returns ``(inserted, skipped)``.
+        """
+        self._prefetch_users()
+        mappings = []
+        skipped = 0
+
+        for record in records:
+            username, email = record.get('username'), record.get('email')
+            if not _present(username) or not _present(email):
+                skipped += 1
+                continue
+
+            username, email = str(username), str(email)
+            if username in self._usernames or email in self._emails:
+                skipped += 1
+                continue
+
+            if _present(record.get('password_hash')):
+                password_hash = record['password_hash']
+            elif _present(record.get('password')):
+                password_hash = generate_password_hash(str(record['password']))
+            else:
+                password_hash = self._default_hash
+
+            self._usernames.add(username)
+            self._emails.add(email)
+            mappings.append({
+                'username': username,
+                'email': email,
+                'password_hash': password_hash,
+                'role': record['role'] if _present(record.get('role')) else 'student',
+                'department': record['department'] if _present(record.get('department')) else None
+            })
+
+        self._insert(User, mappings)
+        self._user_ids = None  # New users have ids now
+        return len(mappings), skipped
+
+    def add_meals(self, records):
+        """Insert meals whose name is new
+
+        Returns ``(inserted, skipped)``.
+        """
+        names = self._meal_id_map()
+        mappings = []
+        skipped = 0
+
+        for record in records:
+            name = str(record['name']) if _present(record.get('name')) else None
+            if name is None or name in names \
+                    or not _present(record.get('price')) or not _present(record.get('category')):
+                skipped += 1
+                continue
+
+            stock = int(record['stock']) if _present(record.get('stock')) else 0
+            names[name] = None
+            mappings.append({
+                'name': name,
+                'description': record['description'] if _present(record.get('description')) else None,
+                'price': float(record['price']),
+                'category': record['category'],
+                'stock': stock,
+                'image_url': record['image_url'] if _present(record.get('image_url')) else None,
+                'is_available': _flag(record['is_available']) if _present(record.get('is_available')) else stock > 0
+            })
+
+        self._insert(Meal, mappings)
+        self._meal_ids = None  # New meals have ids now
+        return len(mappings), skipped
+
+    def add_reservations(self, records):
+        """Insert reservations, resolving ``username``/``meal_name`` to ids
+
+        Rows may give ``user_id``/``meal_id`` directly instead. Rows whose
+        user or meal is unknown, or whose token already exists, are skipped.
+        Returns ``(inserted, skipped)``.
+        """
+        user_ids = self._user_id_map()
+        meal_ids = self._meal_id_map()
+        known_users = set(user_ids.values())
+        known_meals = set(meal_ids.values())
+        self._prefetch_tokens()
+        mappings = []
+        skipped = 0
+
+        for record in records:
+            if _present(record.get('user_id')):
+                user_id = int(record['user_id'])
+                user_id = user_id if user_id in known_users else None
+            else:
+                user_id = user_ids.get(str(record['username'])) if _present(record.get('username')) else None
+
+            if _present(record.get('meal_id')):
+                meal_id = int(record['meal_id'])
+                meal_id = meal_id if meal_id in known_meals else None
+            else:
+                meal_id = meal_ids.get(str(record['meal_name'])) if _present(record.get('meal_name')) else None
+
+            token = str(record['token']) if _present(record.get('token')) else self._generate_token()
+            if user_id is None or meal_id is None or not _present(record.get('pickup_time')) \
+                    or token in self._tokens:
+                skipped += 1
+                continue
+
+            pickup_time = _datetime(record['pickup_time'])
+            self._tokens.add(token)
+            mappings.append({
+                'user_id': user_id,
+                'meal_id': meal_id,
+                'pickup_time': pickup_time,
+                'status': record['status'] if _present(record.get('status')) else 'completed',
+                'quantity': int(record['quantity']) if _present(record.get('quantity')) else 1,
+                'token': token,
+                'created_at': _datetime(record['created_at']) if _present(record.get('created_at')) else pickup_time
+            })
+
+        self._insert(Reservation, mappings)
+        return len(mappings), skipped
+
+    def load_file(self, kind, path):
+        """Import a ``users``, ``meals`` or ``reservations`` file
+
+        Returns ``(inserted, skipped)`` summed over every chunk.
+        """
+        add = {'users': self.add_users, 'meals': self.add_meals, 'reservations': self.add_reservations}[kind]
+        inserted = skipped = 0
+        for records in read_records(path, self.chunk_size):
+            chunk_inserted, chunk_skipped = add(records)
+            inserted += chunk_inserted
+            skipped += chunk_skipped
+        return inserted, skipped
@@ -3,8 +3,9 @@ Sample Data Initialization Script
 Run this after first starting the application to populate with sample data
 '''
 
-from app import app, db
-from models import User, Meal, Reservation
+from app import app
+from data_import import BulkImporter
+from models import User, Meal, RushHour
 from datetime import datetime, timedelta
 import random
 
@@ -12,25 +13,20 @@ def init_sample_data():
     with app.app_context():
         print("Initializing sample data...")
 
-        # Create sample students
-        students = []
-        departments = ['Computer Science', 'Engineering', 'Business', 'Arts', 'Science']
-
-        for i in range(1, 11):
-            username = f'student{i}'
-            if not User.query.filter_by(username=username).first():
-                student = User(
-                    username=username,
-                    email=f'student{i}@university.com',
-                    role='student',
-                    department=random.choice(departments)
-                )
-                student.set_password('password123')
-                students.append(student)
-                db.session.add(student)
+        # Sample students all get the default password, which is hashed once
+        importer = BulkImporter(default_password='password123')
 
-        db.session.commit()
-        print(f"✓ Created {len(students)} sample students")
+        departments = ['Computer Science', 'Engineering', 'Business', 'Arts', 'Science']
+        students_created, _ = importer.add_users(
+            {
+                'username': f'student{i}',
+                'email': f'student{i}@university.com',
+                'role': 'student',
+                'department': random.choice(departments)
+            }
+            for i in range(1, 11)
+        )
+        print(f"✓ Created {students_created} sample students")
 
         # Create sample meals
         sample_meals = [
@@ -127,51 +123,40 @@ def init_sample_data():
             }
         ]
 
-        meals_created = 0
-        for meal_data in sample_meals:
-            if not Meal.query.filter_by(name=meal_data['name']).first():
-                meal = Meal(**meal_data, is_available=True)
-                db.session.add(meal)
-                meals_created += 1
-
-        db.session.commit()
+        meals_created, _ = importer.add_meals(dict(meal, is_available=True) for meal in sample_meals)
         print(f"✓ Created {meals_created} sample meals")
 
         # Create sample historical reservations for ML training
-        all_students = User.query.filter_by(role='student').all()
-        all_meals = Meal.query.all()
+        student_ids = [user_id for user_id, in User.query.with_entities(User.id).filter_by(role='student')]
+        meal_ids = [meal_id for meal_id, in Meal.query.with_entities(Meal.id)]
 
-        if all_students and all_meals:
-            reservations_created = 0
+        if student_ids and meal_ids:
+            history = []
             # Create reservations for past 30 days
             for days_ago in range(30, 0, -1):
                 # Create 5-15 reservations per day
                 num_reservations = random.randint(5, 15)
 
                 for _ in range(num_reservations):
-                    student = random.choice(all_students)
-                    meal = random.choice(all_meals)
-
                     # Random time between 8 AM and 7 PM
                     hour = random.randint(8, 19)
                     pickup_time = datetime.now() - timedelta(days=days_ago, hours=random.randint(0, 23))
                     pickup_time = pickup_time.replace(hour=hour, minute=random.choice([0, 15, 30, 45]))
 
-                    # Create reservation
-                    reservation = Reservation(
-                        user_id=student.id,
-                        meal_id=meal.id,
-                        pickup_time=pickup_time,
-                        quantity=random.randint(1, 2),
-                        status='completed'
-                    )
-                    reservation.generate_token()
-                    db.session.add(reservation)
-                    reservations_created += 1
+                    history.append({
+                        'user_id': random.choice(student_ids),
+                        'meal_id': random.choice(meal_ids),
+                        'pickup_time': pickup_time,
+                        'quantity': random.randint(1, 2),
+                        'status': 'completed'
+                    })
 
-            db.session.commit()
+            reservations_created, _ = importer.add_reservations(history)
             print(f"✓ Created {reservations_created} historical reservations for ML training")
 
+            slots = RushHour.rebuild()
+            print(f"✓ Rebuilt {slots} rush hour slots")
+
         print("\n✓✓✓ Sample data initialization complete! ✓✓✓")
         print("\nYou can now:")
         print("1. Login as admin (username: admin, password: admin123)")
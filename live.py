@@ -0,0 +1,159 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, Meal
+
+
+# How far back each poll re-reads ``Meal.updated_at``. A transaction stamps
+# the row when it flushes but may commit a little later, and other workers'
+# clocks may differ slightly; values already sent are filtered out anyway.
+POLL_LOOKBACK = timedelta(seconds=10)
+
+
+class LiveFeed:
+    """Server-sent events feed of meal stock and rush level changes
+
+    While anyone is subscribed, a publisher thread polls the database every
+    ``interval`` seconds for meals whose ``updated_at`` moved (every stock
+    write bumps it, including the bulk UPDATEs) and for today's rush level
+    forecast, and sends what differs from the values it sent last. Polling
+    committed rows rather than watching this process's session means each
+    worker's feed also sees reservations made through the other workers, and
+    a burst of writes still becomes one message per interval. Messages carry
+    current values, not increments, so a client that misses one is corrected
+    by the next.
+
+    Every open stream holds a worker thread or greenlet, so serve it from an
+    async worker (e.g. gunicorn's gevent worker class).
+    """
+
+    def __init__(self, app, predictor, interval=1.0, keepalive=15, queue_size=64):
+        self.app = app
+        self.predictor = predictor
+        self.interval = interval
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._meals = {}  # meal id -> (stock, is_available) last published
+        self._meals_seen = None  # Newest Meal.updated_at read so far
+        self._rush_date = None
+        self._rush_levels = {}  # hour -> (count, level) last published for _rush_date
+        self._lock = threading.Lock()
+        self._publisher = None
+
+    def subscribe(self):
+        subscriber = queue.Queue(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._publisher is None:
+                self._publisher = threading.Thread(target=self._run, name='live-feed', daemon=True)
+                self._publisher.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self):
+        """Yield server-sent events for one client until it disconnects"""
+        subscriber = self.subscribe()
+        try:
+            yield f'retry: {int(self.interval * 5000)}\n\n'
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'  # Stops proxies closing an idle stream
+        finally:
+            self.unsubscribe(subscriber)
+
+    def response(self):
+        return current_app.response_class(
+            self.stream(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                listening = bool(self._subscribers)
+            if not listening:
+                continue
+
+            try:
+                with self.app.app_context():
+                    stock_update = self._stock_update()
+                    if stock_update['meals']:
+                        self._broadcast('stock', stock_update)
+                    rush_update = self._rush_update()
+                    if rush_update['hours']:
+                        self._broadcast('rush', rush_update)
+            except Exception as e:
+                print(f"⚠ Live feed update failed: {e}")
+
+    def _stock_update(self):
+        """Meals whose stock or availability changed since the last update"""
+        query = db.session.query(Meal.id, Meal.stock, Meal.is_available, Meal.updated_at)
+        if self._meals_seen is not None:
+            query = query.filter(Meal.updated_at >= self._meals_seen - POLL_LOOKBACK)
+
+        changed = []
+        for meal_id, stock, is_available, updated_at in query:
+            if updated_at and (self._meals_seen is None or updated_at > self._meals_seen):
+                self._meals_seen = updated_at
+            if self._meals.get(meal_id) != (stock, is_available):
+                self._meals[meal_id] = (stock, is_available)
+                changed.append({'id': meal_id, 'stock': stock, 'is_available': is_available})
+        if self._meals_seen is None:
+            self._meals_seen = datetime.utcnow()
+
+        # Deleted meals leave no row to poll, only a smaller count
+        if db.session.query(db.func.count(Meal.id)).scalar() < len(self._meals):
+            existing = {meal_id for meal_id, in db.session.query(Meal.id)}
+            for meal_id in self._meals.keys() - existing:
+                del self._meals[meal_id]
+                changed.append({'id': meal_id, 'stock': 0, 'is_available': False})
+        return {'meals': sorted(changed, key=lambda meal: meal['id'])}
+
+    def _rush_update(self):
+        """Today's rush levels that changed since the last update"""
+        today = datetime.utcnow().date()
+        if today != self._rush_date:
+            self._rush_date = today
+            self._rush_levels = {}
+
+        # Recomputing also refreshes the memoized forecast other pages read
+        self.predictor.invalidate_forecasts(today)
+        hours = []
+        for hour, data in self.predictor.predict_rush_hours(today).items():
+            current = (data['count'], data['level'])
+            if self._rush_levels.get(hour) != current:
+                self._rush_levels[hour] = current
+                hours.append(data)
+        return {'date': today.isoformat(), 'hours': hours}
+
+    def _broadcast(self, name, data):
+        message = f'event: {name}\ndata: {json.dumps(data)}\n\n'
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # A client this far behind has to reload its state instead
+                self._reset(subscriber)
+
+    def _reset(self, subscriber):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        subscriber.put_nowait('event: reset\ndata: {}\n\n')
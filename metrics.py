@@ -0,0 +1,204 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the SQL statements per request histogram buckets
+STATEMENT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Metric:
+    """Base class for a metric family with a fixed set of label names"""
+
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield ``(name, labels, value)`` for every sample of the family"""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name + '_total', list(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the ``with`` block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total, count))
+                            for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in values:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield self.name + '_bucket', labels + [('le', _format_value(bound))], cumulative
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+class Registry:
+    """Collection of metric families rendered in the Prometheus text format
+
+    Values live in process memory, so each worker process exposes its own
+    counters; Prometheus aggregates them across scrape targets.
+    """
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    'canteen_http_requests', 'HTTP requests handled', ['method', 'endpoint', 'status']
+))
+REQUEST_LATENCY = registry.register(Histogram(
+    'canteen_http_request_duration_seconds', 'Time spent handling a request',
+    ['method', 'endpoint']
+))
+REQUEST_STATEMENTS = registry.register(Histogram(
+    'canteen_http_request_sql_statements', 'SQL statements executed per request',
+    ['method', 'endpoint'], buckets=STATEMENT_BUCKETS
+))
+REQUEST_DB_TIME = registry.register(Histogram(
+    'canteen_http_request_db_duration_seconds', 'Time spent executing SQL per request',
+    ['method', 'endpoint']
+))
+NO_SHOWS = registry.register(Counter(
+    'canteen_no_shows', 'Reservations marked no-show and restocked by the sweeper'
+))
+MODEL_INFERENCE = registry.register(Histogram(
+    'canteen_model_inference_duration_seconds', 'Time spent computing demand and rush hour forecasts',
+    ['operation']
+))
+
+
+def instrument_engine(engine):
+    """Count statements and accumulate SQL time on ``g`` for each request"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def finish_statement(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['statement_started'].pop()
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+            g.db_time = g.get('db_time', 0.0) + elapsed
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_statement(exception_context):
+        # after_cursor_execute does not fire for a statement that raised
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('statement_started'):
+            conn.info['statement_started'].pop()
+
+
+def instrument_app(app):
+    """Record latency, SQL statements and SQL time of every request"""
+
+    @app.before_request
+    def start_request():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+
+        # Unrouted requests (404s) share one label instead of one per URL
+        labels = {'method': request.method, 'endpoint': request.endpoint or 'unmatched'}
+        REQUESTS.inc(status=response.status_code, **labels)
+        REQUEST_LATENCY.observe(time.perf_counter() - started, **labels)
+        REQUEST_STATEMENTS.observe(g.get('query_count', 0), **labels)
+        REQUEST_DB_TIME.observe(g.get('db_time', 0.0), **labels)
+        return response
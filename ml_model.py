@@ -1,181 +1,919 @@
-import pandas as pd
+# pandas, scikit-learn and joblib are imported where they are used so that
+# importing this module (and starting a worker) stays cheap until the first
+# prediction or training run.
+import copy
+import json
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, r2_score
 import pickle
 import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from models import db, Reservation, Meal, Prediction, RushHour
+from config import Config
+from metrics import MODEL_INFERENCE
+from models import db, day_of, Reservation, Meal, Prediction, RushHour
+
+# Hours covered by demand forecasts (8 AM to 8 PM)
+FORECAST_HOURS = list(range(8, 21))
+
+FEATURE_COLUMNS = ['meal_id', 'day_of_week', 'hour', 'is_weekend',
+                   'price', 'category_breakfast', 'category_lunch', 'category_dinner']
+
+# Finished training jobs kept for status lookups
+MAX_TRAINING_JOBS = 20
+
+# A job still queued or running after this long is assumed to have died
+# with its worker and no longer blocks new training runs
+STALE_JOB_SECONDS = 3600
+
+JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# Seconds between checks of the LATEST pointer for models published by
+# other worker processes
+MODEL_RELOAD_SECONDS = 5
+
+# Reservation statuses that count as demand when training
+TRAINING_STATUSES = ['completed', 'confirmed']
+
+# Columns identifying one training aggregate; the saved training state keeps
+# them split further by the day the reservations were made (BUCKET_KEYS)
+AGGREGATE_KEYS = ['meal_id', 'day_of_week', 'hour']
+BUCKET_KEYS = AGGREGATE_KEYS + ['created_on']
+
+# Trees added by each incremental update, and the most a forest keeps
+INCREMENTAL_TREES = 20
+MAX_TREES = 200
+
+# Reservation ids up to this far below the training watermark that were not
+# visible yet are read again by the next incremental update: a transaction
+# may have taken the id and still be about to commit. Missing ids further
+# down are taken to be deleted or rolled back.
+WATERMARK_MARGIN = 1000
+
+# Days of recent reservations averaged while no trained model is available
+FALLBACK_DAYS = 14
+
+# Alternating passes fitting the lookup table's meal levels and hour profile
+PRIOR_ITERATIONS = 10
+
+
+def split_training_data(X, y, test_fraction=0.2, seed=42):
+    """Shuffle rows and split them into train and test sets"""
+    order = np.random.default_rng(seed).permutation(len(X))
+    n_test = int(np.ceil(len(X) * test_fraction))
+    test, train = order[:n_test], order[n_test:]
+    return X.iloc[train], X.iloc[test], y.iloc[train], y.iloc[test]
+
+
+def evaluate(y_true, y_pred):
+    """Mean absolute error and R² of predictions"""
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    mae = np.abs(y_true - y_pred).mean()
+    total = ((y_true - y_true.mean()) ** 2).sum()
+    r2 = 1 - ((y_true - y_pred) ** 2).sum() / total if total else 0.0
+    return float(mae), float(r2)
+
+
+class ForestBackend:
+    """RandomForest regressor over all FEATURE_COLUMNS (needs scikit-learn)"""
+
+    name = 'forest'
+
+    def __init__(self, model=None):
+        if model is None:
+            from sklearn.ensemble import RandomForestRegressor
+
+            model = RandomForestRegressor(
+                n_estimators=100,
+                max_depth=10,
+                random_state=42,
+                n_jobs=-1
+            )
+        self.model = model
+
+    @property
+    def fitted(self):
+        return hasattr(self.model, 'estimators_')
+
+    def fit(self, X, y):
+        self.model.fit(X, y)
+        return self
+
+    def extend(self, X, y, seed):
+        """A copy of this forest grown by ``INCREMENTAL_TREES`` trees fitted on ``X``
+
+        The oldest trees beyond ``MAX_TREES`` are dropped. The copy is
+        returned, so predictions can keep using this forest meanwhile.
+        """
+        updated = copy.copy(self.model)
+        updated.estimators_ = list(self.model.estimators_[-(MAX_TREES - INCREMENTAL_TREES):])
+        updated.n_estimators = len(updated.estimators_) + INCREMENTAL_TREES
+        updated.warm_start = True
+        # Seed the new trees differently from the ones already in the forest
+        updated.random_state = int(seed)
+        return ForestBackend(updated).fit(X, y)
+
+    def predict(self, X):
+        if isinstance(X, np.ndarray):
+            import pandas as pd
+            X = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+        return self.model.predict(X)
+
+    def describe(self):
+        return {'trees': len(self.model.estimators_)}
+
+
+class LookupTableBackend:
+    """Mean demand per (meal, weekday, hour) cell, read from a NumPy array
+
+    Only the meal id, weekday and hour columns are used. Each cell is
+    shrunk towards a prior of the meal's overall level times the
+    weekday/hour profile of all meals, weighted as ``smoothing`` extra
+    observations, so cells with little or no history get a sensible
+    estimate. Meals without any history get the profile itself. A
+    prediction is a single fancy-indexing lookup.
+    """
+
+    name = 'lookup'
+
+    def __init__(self, smoothing=1.0):
+        self.smoothing = smoothing
+        self.meal_ids = None  # sorted meal ids; row i of table is meal_ids[i]
+        self.table = None     # meals x 7 weekdays x 24 hours
+        self.profile = None   # 7 weekdays x 24 hours, over all meals
+
+    @property
+    def fitted(self):
+        return self.table is not None
+
+    def _cells(self, X):
+        X = np.asarray(X, dtype=float)
+        return X[:, 0].astype(int), X[:, 1].astype(int), X[:, 2].astype(int)
+
+    def fit(self, X, y):
+        meal_ids, days, hours = self._cells(X)
+        y = np.asarray(y, dtype=float)
+        k = self.smoothing
+
+        self.meal_ids = np.unique(meal_ids)
+        rows = np.searchsorted(self.meal_ids, meal_ids)
+        shape = (len(self.meal_ids), 7, 24)
+        sums = np.zeros(shape)
+        counts = np.zeros(shape)
+        np.add.at(sums, (rows, days, hours), y)
+        np.add.at(counts, (rows, days, hours), 1)
+
+        # Prior: each meal's level times a weekday/hour profile, fitted
+        # alternately on the observed cells (a meal only has a cell once it
+        # was ordered then, so plain per-cell means would favour popular meals)
+        n_meals = len(self.meal_ids)
+        cell_sums = sums.sum(axis=0)
+        meal_sums = np.bincount(rows, weights=y, minlength=n_meals)
+        weight = k * y.mean()
+        ratios = np.ones(n_meals)
+        profile = np.full((7, 24), y.mean())
+        for _ in range(PRIOR_ITERATIONS):
+            cell_weights = np.zeros((7, 24))
+            np.add.at(cell_weights, (days, hours), ratios[rows])
+            np.divide(cell_sums, cell_weights, out=profile, where=cell_weights > 0)
+            expected = np.bincount(rows, weights=profile[days, hours], minlength=n_meals)
+            ratios = (meal_sums + weight) / (expected + weight)  # smoothed towards 1
+
+        # A meal without history gets the level of the average meal
+        scale = ratios.mean()
+        ratios /= scale
+        profile *= scale
+
+        prior = ratios[:, None, None] * profile[None, :, :]
+        self.table = ((sums + k * prior) / (counts + k)).astype(np.float32)
+        self.profile = profile.astype(np.float32)
+        return self
+
+    def extend(self, X, y, seed):
+        """A table rebuilt from ``X``; refitting from aggregates is already cheap"""
+        return LookupTableBackend(self.smoothing).fit(X, y)
+
+    def predict(self, X):
+        if not self.fitted:
+            raise RuntimeError('Lookup table has not been fitted')
+        meal_ids, days, hours = self._cells(X)
+        rows = np.minimum(np.searchsorted(self.meal_ids, meal_ids), len(self.meal_ids) - 1)
+        known = self.meal_ids[rows] == meal_ids
+        return np.where(known, self.table[rows, days, hours], self.profile[days, hours])
+
+    def describe(self):
+        return {'meals': len(self.meal_ids)}
+
+
+# Predictor backends selectable with Config.MODEL_BACKEND
+BACKENDS = {backend.name: backend for backend in (LookupTableBackend, ForestBackend)}
 
 class DemandPredictor:
-    def __init__(self, model_path='models/demand_prediction_model.pkl'):
-        self.model_path = model_path
-        self.model = None
-        self.load_model()
+    """Demand and rush hour predictions backed by a lazily loaded model
+
+    Trained models are stored as versioned joblib files in ``model_dir``;
+    a ``LATEST`` pointer file names the version to load. Every process
+    re-reads the pointer when it changes, so a model trained by one worker
+    is picked up by all of them. Training jobs are recorded as JSON files
+    under ``model_dir/jobs`` for the same reason. ``backend`` names
+    the kind of model (see ``BACKENDS``) that training produces; a saved
+    model of another kind keeps serving until the next training run.
+    """
+
+    def __init__(self, model_dir='models', keep_versions=5, forecast_ttl=300, forecast_days=7,
+                 backend='lookup'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown model backend {backend!r}; choose one of {', '.join(BACKENDS)}")
+        self.backend = backend
+        self.model_dir = model_dir
+        self.keep_versions = keep_versions
+        self.forecast_ttl = forecast_ttl
+        self.forecast_days = forecast_days
+        self.legacy_path = os.path.join(model_dir, 'demand_prediction_model.pkl')
+        self._model = None
+        self._version = None
+        self._state = None  # training state of the current model version
+        self._model_lock = threading.Lock()
+        self._pointer_mtime = None  # of the LATEST file the model was loaded from
+        self._next_pointer_check = 0
+        self._jobs_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-training')
+        self._forecasts = {}  # target_date -> (expires_at, rush hour forecast)
+        self._forecasts_lock = threading.Lock()
+        self._refresher = None
+
+    @property
+    def model(self):
+        """The current model, loaded on first use and reloaded when another process publishes one"""
+        stale = self._pointer_changed()
+        if self._model is None or stale:
+            with self._model_lock:
+                if self._model is None or stale:
+                    self.load_model()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def _version_path(self, version):
+        return os.path.join(self.model_dir, f'demand_model-{version}.joblib')
+
+    def _state_path(self, version):
+        return os.path.join(self.model_dir, f'demand_state-{version}.joblib')
+
+    def _pointer_path(self):
+        return os.path.join(self.model_dir, 'LATEST')
+
+    def _pointer_stat(self):
+        try:
+            return os.stat(self._pointer_path()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _pointer_changed(self):
+        """Whether LATEST changed since the model was loaded
+
+        Checked at most every ``MODEL_RELOAD_SECONDS``.
+        """
+        now = time.monotonic()
+        if self._model is None or now < self._next_pointer_check:
+            return False
+        self._next_pointer_check = now + MODEL_RELOAD_SECONDS
+        return self._pointer_stat() != self._pointer_mtime
+
+    def current_version(self):
+        """Return the registry version named by the LATEST pointer, if any"""
+        try:
+            with open(self._pointer_path()) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and os.path.exists(self._version_path(version)) else None
 
     def load_model(self):
         """Load existing model or create new one"""
-        if os.path.exists(self.model_path):
-            with open(self.model_path, 'rb') as f:
-                self.model = pickle.load(f)
-            print(f"✓ Loaded model from {self.model_path}")
+        self._pointer_mtime = self._pointer_stat()
+        version = self.current_version()
+        self._version = version
+        self._state = None
+        if version:
+            import joblib
+            # Memory-map plain NumPy arrays (the lookup table) so workers
+            # share the same pages. scikit-learn copies a forest's tree
+            # arrays into its own memory on load, so each worker still
+            # holds a private copy of a forest.
+            model = joblib.load(self._version_path(version), mmap_mode='r')
+            print(f"✓ Loaded model version {version}")
+        elif os.path.exists(self.legacy_path):
+            with open(self.legacy_path, 'rb') as f:
+                model = pickle.load(f)
+            print(f"✓ Loaded model from {self.legacy_path}")
         else:
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=10,
-                random_state=42
-            )
-            print("✓ Created new RandomForest model")
+            model = self._new_model()
+            print(f"✓ Created new {self.backend} model")
+
+        # Models saved before backends existed are bare RandomForest regressors
+        if not isinstance(model, tuple(BACKENDS.values())):
+            model = ForestBackend(model)
+        self._model = model
+
+    def _new_model(self):
+        return BACKENDS[self.backend]()
+
+    def save_model(self, model=None, state=None):
+        """Save trained model as a new registry version and return the version
+
+        ``state`` (training aggregates and watermark) is saved next to it
+        for incremental updates. Files are written under a temporary name
+        and renamed into place, so readers never observe a partially
+        written model.
+        """
+        import joblib
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        path = self._version_path(version)
+
+        if state is not None:
+            state_path = self._state_path(version)
+            joblib.dump(state, state_path + '.tmp')
+            os.replace(state_path + '.tmp', state_path)
+
+        # Uncompressed so that NumPy arrays can be memory-mapped on load
+        joblib.dump(model if model is not None else self.model, path + '.tmp')
+        os.replace(path + '.tmp', path)
+
+        pointer = self._pointer_path()
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(pointer + '.tmp', pointer)
+        self._pointer_mtime = self._pointer_stat()  # Published by this process
+
+        self._prune_versions(version)
+        print(f"✓ Model saved to {path}")
+        return version
+
+    def _prune_versions(self, current):
+        """Remove all but the newest ``keep_versions`` model files"""
+        versions = sorted(
+            name[len('demand_model-'):-len('.joblib')]
+            for name in os.listdir(self.model_dir)
+            if name.startswith('demand_model-') and name.endswith('.joblib')
+        )
+        for version in versions[:-self.keep_versions]:
+            if version == current:
+                continue
+            for path in (self._version_path(version), self._state_path(version)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Missing, or still open by another process on some platforms
+
+    def _load_state(self):
+        """Training state saved with the current model, or None"""
+        if self._state is None and self._version:
+            path = self._state_path(self._version)
+            if os.path.exists(path):
+                import joblib
+                self._state = joblib.load(path)
+        return self._state
+
+    def _aggregate_reservations(self, *filters, by_created_day=False):
+        """Sum reservations matching ``filters`` per (meal_id, day_of_week, hour)
+
+        With ``by_created_day`` the sums are also split by the day the
+        reservations were made (a ``created_on`` column). The aggregation
+        runs in the database so only one row per group (not per reservation)
+        reaches Python.
+        """
+        sunday_weekday = db.extract('dow', Reservation.pickup_time)
+        hour = db.extract('hour', Reservation.pickup_time)
+        groups = [Reservation.meal_id, sunday_weekday, hour]
+        columns = [
+            Reservation.meal_id,
+            sunday_weekday.label('sunday_weekday'),
+            hour.label('hour'),
+            db.func.sum(Reservation.quantity).label('demand'),
+            db.func.count(Reservation.id).label('reservations')
+        ]
+        if by_created_day:
+            created_on = day_of(Reservation.created_at)
+            groups.append(created_on)
+            columns.append(created_on.label('created_on'))
+
+        query = db.session.query(*columns).filter(
+            Reservation.status.in_(TRAINING_STATUSES), *filters
+        ).group_by(*groups)
+
+        import pandas as pd
+
+        aggregated = pd.read_sql(query.statement, db.session.connection())
+        aggregated['day_of_week'] = (aggregated['sunday_weekday'].astype(int) + 6) % 7  # 0=Monday, 6=Sunday
+        aggregated['hour'] = aggregated['hour'].astype(int)
+        # Typed even when no rows matched, so aggregates can be combined
+        counts = aggregated[AGGREGATE_KEYS + ['demand', 'reservations']].astype(int)
+        if by_created_day:
+            counts.insert(len(AGGREGATE_KEYS), 'created_on', pd.to_datetime(aggregated['created_on']))
+        return counts
+
+    @staticmethod
+    def _sum_buckets(buckets):
+        """Aggregates over every creation day in ``buckets``"""
+        return buckets.groupby(AGGREGATE_KEYS, as_index=False)[['demand', 'reservations']].sum()
+
+    @staticmethod
+    def _window_start(days_back):
+        """Midnight starting the ``days_back``-day training window
+
+        Whole days, so a window always covers whole ``created_on`` buckets.
+        """
+        start = datetime.utcnow().date() - timedelta(days=days_back)
+        return datetime.combine(start, datetime.min.time())
+
+    def _features(self, aggregated):
+        """Join meal attributes onto aggregates and build the feature matrix"""
+        import pandas as pd
+
+        meals = pd.read_sql(
+            db.session.query(Meal.id.label('meal_id'), Meal.price, Meal.category).statement,
+            db.session.connection()
+        )
+        data = aggregated.merge(meals, on='meal_id')
+        data['is_weekend'] = (data['day_of_week'] >= 5).astype(int)
+        for category in ('breakfast', 'lunch', 'dinner'):
+            data[f'category_{category}'] = (data['category'] == category).astype(int)
 
-    def save_model(self):
-        """Save trained model"""
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        with open(self.model_path, 'wb') as f:
-            pickle.dump(self.model, f)
-        print(f"✓ Model saved to {self.model_path}")
+        return data[FEATURE_COLUMNS], data['demand']
 
     def prepare_training_data(self, days_back=60):
         """Prepare training data from historical reservations"""
         cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        aggregated = self._aggregate_reservations(Reservation.created_at >= cutoff_date)
 
-        # Get historical reservations
-        reservations = Reservation.query.filter(
-            Reservation.created_at >= cutoff_date,
-            Reservation.status.in_(['completed', 'confirmed'])
-        ).all()
-
-        if len(reservations) < 50:
-            print(f"⚠ Insufficient data: only {len(reservations)} reservations found")
+        total_reservations = int(aggregated['reservations'].sum())
+        if total_reservations < 50:
+            print(f"⚠ Insufficient data: only {total_reservations} reservations found")
             return None, None
 
-        # Create features
-        data = []
-        for res in reservations:
-            meal = Meal.query.get(res.meal_id)
-            if not meal:
-                continue
-
-            pickup_time = res.pickup_time
-
-            features = {
-                'meal_id': res.meal_id,
-                'day_of_week': pickup_time.weekday(),  # 0=Monday, 6=Sunday
-                'hour': pickup_time.hour,
-                'is_weekend': 1 if pickup_time.weekday() >= 5 else 0,
-                'price': meal.price,
-                'category_breakfast': 1 if meal.category == 'breakfast' else 0,
-                'category_lunch': 1 if meal.category == 'lunch' else 0,
-                'category_dinner': 1 if meal.category == 'dinner' else 0,
-                'quantity': res.quantity
-            }
-            data.append(features)
+        return self._features(aggregated)
 
-        df = pd.DataFrame(data)
+    def _fit_and_publish(self, model, X, y, state, started, mode):
+        """Fit ``model`` (or extend it, for incremental runs), evaluate it, then save and swap it in"""
+        # Split data
+        X_train, X_test, y_train, y_test = split_training_data(X, y)
 
-        # Aggregate by meal_id, day_of_week, hour
-        aggregated = df.groupby(['meal_id', 'day_of_week', 'hour']).agg({
-            'quantity': 'sum',
-            'is_weekend': 'first',
-            'price': 'first',
-            'category_breakfast': 'first',
-            'category_lunch': 'first',
-            'category_dinner': 'first'
-        }).reset_index()
+        # Train model
+        if mode == 'incremental':
+            model = model.extend(X_train, y_train, seed=state['watermark'])
+        else:
+            model.fit(X_train, y_train)
 
-        aggregated.rename(columns={'quantity': 'demand'}, inplace=True)
+        # Evaluate
+        mae, r2 = evaluate(y_test, model.predict(X_test))
 
-        X = aggregated[['meal_id', 'day_of_week', 'hour', 'is_weekend', 
-                        'price', 'category_breakfast', 'category_lunch', 'category_dinner']]
-        y = aggregated['demand']
+        print(f"✓ Model trained successfully ({model.name}, {mode})")
+        print(f"  MAE: {mae:.2f}")
+        print(f"  R² Score: {r2:.2f}")
 
-        return X, y
+        # Save model, then publish it
+        version = self.save_model(model, state)
+        self.model = model
+        self._version = version
+        self._state = state
+
+        return {
+            'version': version,
+            'mode': mode,
+            'mae': round(float(mae), 4),
+            'r2': round(float(r2), 4),
+            'rows': len(X),
+            'backend': model.name,
+            **model.describe(),
+            'duration_seconds': round(time.perf_counter() - started, 3)
+        }
+
+    def _read_watermark(self):
+        """The last visible reservation id, and the ids just below it not visible yet
+
+        Reservations are aggregated up to the watermark without the unseen
+        ids, so one committing meanwhile is read exactly once, next time.
+        """
+        watermark = db.session.query(db.func.coalesce(db.func.max(Reservation.id), 0)).scalar()
+        lowest = max(watermark - WATERMARK_MARGIN, 0) + 1
+        visible = {reservation_id for reservation_id, in db.session.query(Reservation.id).filter(
+            Reservation.id >= lowest, Reservation.id <= watermark
+        )}
+        return watermark, sorted(set(range(lowest, watermark + 1)) - visible)
+
+    @staticmethod
+    def _up_to_watermark(watermark, unseen_ids):
+        filters = [Reservation.id <= watermark]
+        if unseen_ids:
+            filters.append(Reservation.id.notin_(unseen_ids))
+        return filters
+
+    def train(self, days_back=60):
+        """Train the demand prediction model from the full history window
+
+        Fits a fresh model and only swaps it in once it is fitted and saved,
+        so concurrent predictions keep using the previous model meanwhile.
+        The per-(meal, weekday, hour) aggregates, split by the day the
+        reservations were made, and the id of the last reservation read are
+        saved with it for ``train_incremental``. Returns the training
+        metrics, or None when there is not enough data.
+        """
+        started = time.perf_counter()
+        # Read the watermark first; later rows are left for the next update
+        watermark, unseen_ids = self._read_watermark()
+        window_start = self._window_start(days_back)
+        buckets = self._aggregate_reservations(
+            *self._up_to_watermark(watermark, unseen_ids),
+            Reservation.created_at >= window_start,
+            by_created_day=True
+        )
 
-    def train(self):
-        """Train the demand prediction model"""
-        X, y = self.prepare_training_data()
+        total_reservations = int(buckets['reservations'].sum())
+        if total_reservations < 50:
+            print(f"⚠ Insufficient data: only {total_reservations} reservations found")
+            return None
 
-        if X is None or len(X) < 50:
+        X, y = self._features(self._sum_buckets(buckets))
+        if len(X) < 50:
             print("⚠ Not enough data to train model")
-            return False
-
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+            return None
+
+        state = {'buckets': buckets, 'watermark': watermark, 'unseen_ids': unseen_ids}
+        return self._fit_and_publish(self._new_model(), X, y, state, started, 'full')
+
+    def train_incremental(self, days_back=60):
+        """Update the model with reservations made since the last training
+
+        Only reservations past the saved watermark are read, plus those
+        whose ids were taken below it but not yet committed when it was
+        saved (see ``WATERMARK_MARGIN``); they are added to the saved
+        aggregates, and the buckets of days that have aged out
+        of the ``days_back`` window are dropped, taking out exactly what was
+        added for them whatever their reservations' status is now. The
+        current model is then extended with the updated aggregates: a forest
+        grows by ``INCREMENTAL_TREES`` trees, dropping the oldest beyond
+        ``MAX_TREES``, and a lookup table is rebuilt.
+
+        Status changes of reservations read earlier (e.g. a later
+        cancellation or no-show), and reservations committed more than
+        ``WATERMARK_MARGIN`` ids behind the watermark, are only picked up by
+        a full ``train``,
+        which is also run when there is no saved state to update or the
+        configured backend has changed.
+        """
+        model = self.model
+        state = self._load_state()
+        if (state is None or 'buckets' not in state
+                or not model.fitted or model.name != self.backend):
+            return self.train(days_back)
+
+        import pandas as pd
+
+        started = time.perf_counter()
+        watermark, unseen_ids = self._read_watermark()
+        window_start = self._window_start(days_back)
+
+        since = Reservation.id > state['watermark']
+        if state.get('unseen_ids'):
+            since = db.or_(since, Reservation.id.in_(state['unseen_ids']))
+        added = self._aggregate_reservations(
+            since,
+            *self._up_to_watermark(watermark, unseen_ids),
+            Reservation.created_at >= window_start,
+            by_created_day=True
         )
+        kept = state['buckets'][state['buckets']['created_on'] >= window_start]
 
-        # Train model
-        self.model.fit(X_train, y_train)
+        buckets = pd.concat([kept, added]).groupby(
+            BUCKET_KEYS, as_index=False
+        )[['demand', 'reservations']].sum()
 
-        # Evaluate
-        y_pred = self.model.predict(X_test)
-        mae = mean_absolute_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
+        X, y = self._features(self._sum_buckets(buckets))
+        if len(X) < 50:
+            print("⚠ Not enough data to train model")
+            return None
 
-        print(f"✓ Model trained successfully")
-        print(f"  MAE: {mae:.2f}")
-        print(f"  R² Score: {r2:.2f}")
+        new_state = {'buckets': buckets, 'watermark': watermark, 'unseen_ids': unseen_ids}
+        metrics = self._fit_and_publish(model, X, y, new_state, started, 'incremental')
+        metrics['new_reservations'] = int(added['reservations'].sum())
+        return metrics
+
+    def _jobs_dir(self):
+        return os.path.join(self.model_dir, 'jobs')
 
-        # Save model
-        self.save_model()
+    def _job_path(self, job_id):
+        return os.path.join(self._jobs_dir(), f'{job_id}.json')
 
-        return True
+    def _read_job(self, job_id):
+        if not JOB_ID.match(job_id):
+            return None
+        try:
+            with open(self._job_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_job(self, job):
+        os.makedirs(self._jobs_dir(), exist_ok=True)
+        path = self._job_path(job['id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(job, f)
+        os.replace(path + '.tmp', path)
+
+    def _recent_jobs(self):
+        """Job ids on disk, oldest first"""
+        try:
+            names = os.listdir(self._jobs_dir())
+        except FileNotFoundError:
+            return []
+        return sorted(
+            (os.path.getmtime(os.path.join(self._jobs_dir(), name)), name[:-len('.json')])
+            for name in names if name.endswith('.json')
+        )
+
+    def start_training(self, app, incremental=False):
+        """Queue a background training run and return its job id
+
+        ``incremental`` runs ``train_incremental`` instead of a full
+        ``train``. If a run is already queued or running in any worker,
+        its id is returned instead.
+        """
+        with self._jobs_lock:
+            jobs = self._recent_jobs()
+            stale_before = time.time() - STALE_JOB_SECONDS
+            for modified, job_id in jobs:
+                job = self._read_job(job_id)
+                if job and job['status'] in ('queued', 'running') and modified > stale_before:
+                    return job_id
+
+            job_id = uuid.uuid4().hex
+            self._write_job({
+                'id': job_id,
+                'status': 'queued',
+                'mode': 'incremental' if incremental else 'full',
+                'submitted_at': datetime.utcnow().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'metrics': None,
+                'message': None
+            })
+            for _, old_id in jobs[:max(0, len(jobs) + 1 - MAX_TRAINING_JOBS)]:
+                try:
+                    os.remove(self._job_path(old_id))
+                except OSError:
+                    pass
+
+        self._executor.submit(self._run_training_job, app, job_id, incremental)
+        return job_id
+
+    def get_training_job(self, job_id):
+        """Return a snapshot of a training job started by any worker, or None if unknown"""
+        return self._read_job(job_id)
+
+    def _update_job(self, job_id, **fields):
+        with self._jobs_lock:
+            job = self._read_job(job_id)
+            if job:
+                job.update(fields)
+                self._write_job(job)
+
+    def _run_training_job(self, app, job_id, incremental=False):
+        self._update_job(job_id, status='running', started_at=datetime.utcnow().isoformat())
+        try:
+            with app.app_context():
+                metrics = self.train_incremental() if incremental else self.train()
+                if metrics:
+                    # Stored forecasts came from the previous model
+                    metrics['forecasts'] = self.store_forecasts()
+        except Exception as e:
+            self._update_job(job_id, status='failed', message=str(e),
+                             finished_at=datetime.utcnow().isoformat())
+            return
+
+        if metrics:
+            self._update_job(job_id, status='completed', metrics=metrics,
+                             message='Model trained successfully',
+                             finished_at=datetime.utcnow().isoformat())
+        else:
+            self._update_job(job_id, status='failed',
+                             message='Insufficient data to train model',
+                             finished_at=datetime.utcnow().isoformat())
 
     def predict_demand(self, meal_id, day_of_week, hour):
         """Predict demand for a specific meal at a specific time"""
-        meal = Meal.query.get(meal_id)
-        if not meal:
+        predictions = self.predict_demand_batch([meal_id], day_of_week, [hour])
+        if meal_id not in predictions:
             return 0
-
-        is_weekend = 1 if day_of_week >= 5 else 0
-
-        features = pd.DataFrame([{
-            'meal_id': meal_id,
-            'day_of_week': day_of_week,
-            'hour': hour,
-            'is_weekend': is_weekend,
-            'price': meal.price,
-            'category_breakfast': 1 if meal.category == 'breakfast' else 0,
-            'category_lunch': 1 if meal.category == 'lunch' else 0,
-            'category_dinner': 1 if meal.category == 'dinner' else 0
-        }])
+        return predictions[meal_id][0]
+
+    def predict_demand_batch(self, meal_ids, day_of_week, hours):
+        """Predict demand for many meals over many hours with a single model call
+
+        Returns a dict mapping each known meal id to a list of predictions
+        aligned with ``hours``.
+        """
+        hours = list(hours)
+        meals = db.session.query(Meal.id, Meal.price, Meal.category).filter(Meal.id.in_(meal_ids)).all()
+        if not meals or not hours:
+            return {}
+
+        meal_features = np.array([
+            [
+                meal_id,
+                price,
+                category == 'breakfast',
+                category == 'lunch',
+                category == 'dinner'
+            ]
+            for meal_id, price, category in meals
+        ], dtype=float)
+
+        # One row per (meal, hour), meal-major
+        rows = np.repeat(meal_features, len(hours), axis=0)
+        n_rows = len(rows)
+        matrix = np.column_stack([
+            rows[:, 0],
+            np.full(n_rows, day_of_week),
+            np.tile(hours, len(meals)),
+            np.full(n_rows, 1 if day_of_week >= 5 else 0),
+            rows[:, 1:]
+        ])
 
         try:
-            prediction = self.model.predict(features)[0]
-            return max(0, int(prediction))
+            model = self.model
+            with MODEL_INFERENCE.time(operation='predict_demand'):
+                raw = model.predict(matrix)
+            predicted = np.maximum(0, raw).astype(int)
+            grid = predicted.reshape(len(meals), len(hours))
+            return {meal.id: grid[i].tolist() for i, meal in enumerate(meals)}
         except:
             # Fallback: return average demand
-            return self._get_average_demand(meal_id)
-
-    def _get_average_demand(self, meal_id):
-        """Fallback: calculate average historical demand"""
-        reservations = Reservation.query.filter_by(
-            meal_id=meal_id,
-            status='completed'
-        ).limit(100).all()
-
-        if not reservations:
-            return 10  # Default
+            averages = self._get_average_demand([meal.id for meal in meals])
+            return {meal.id: [averages[meal.id]] * len(hours) for meal in meals}
+
+    def _get_average_demand(self, meal_ids):
+        """Fallback: calculate average recent demand per meal
+
+        Only reservations created in the last ``FALLBACK_DAYS`` days are
+        read, so the fallback costs the same however long the history is.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=FALLBACK_DAYS)
+        averages = dict(
+            db.session.query(Reservation.meal_id, db.func.avg(Reservation.quantity)).filter(
+                Reservation.created_at >= cutoff,
+                Reservation.meal_id.in_(meal_ids),
+                Reservation.status == 'completed'
+            ).group_by(Reservation.meal_id).all()
+        )
 
-        total = sum(r.quantity for r in reservations)
-        return max(5, int(total / len(reservations)))
+        return {
+            meal_id: max(5, int(averages[meal_id])) if meal_id in averages else 10  # Default
+            for meal_id in meal_ids
+        }
+
+    def store_forecasts(self, days=None, start_date=None):
+        """Write hourly demand forecasts for every meal into the Prediction table
+
+        Covers ``days`` days (default ``forecast_days``) from ``start_date``
+        (default today), replacing forecasts already stored for those dates.
+        Returns the number of rows written.
+        """
+        days = days or self.forecast_days
+        start_date = start_date or datetime.utcnow().date()
+        dates = [start_date + timedelta(days=i) for i in range(days)]
+        meal_ids = [meal_id for (meal_id,) in db.session.query(Meal.id).all()]
+
+        rows = []
+        for target_date in dates:
+            forecast = self.predict_demand_batch(meal_ids, target_date.weekday(), FORECAST_HOURS)
+            for meal_id, demand in forecast.items():
+                rows.extend(
+                    {
+                        'meal_id': meal_id,
+                        'date': target_date,
+                        'time_slot': f'{hour:02d}:00',
+                        'predicted_demand': predicted
+                    }
+                    for hour, predicted in zip(FORECAST_HOURS, demand)
+                )
+
+        Prediction.query.filter(Prediction.date.in_(dates)).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(Prediction, rows)
+        db.session.commit()
+        return len(rows)
+
+    def stored_forecasts(self, target_date):
+        """Read stored forecasts for a date as {meal_id: [demand per FORECAST_HOURS]}"""
+        slots = {f'{hour:02d}:00': i for i, hour in enumerate(FORECAST_HOURS)}
+        forecast = {}
+
+        rows = db.session.query(
+            Prediction.meal_id, Prediction.time_slot, Prediction.predicted_demand
+        ).filter(Prediction.date == target_date).all()
+
+        for meal_id, time_slot, predicted in rows:
+            if time_slot in slots:
+                demand = forecast.setdefault(meal_id, [0] * len(FORECAST_HOURS))
+                demand[slots[time_slot]] = predicted
+
+        return forecast
+
+    def backfill_actual_demand(self, days_back=7):
+        """Fill in actual_demand for stored forecasts of the past ``days_back`` days
+
+        Actual demand is the quantity of completed reservations picked up in
+        each slot. Today is skipped because it is not over yet. Returns the
+        number of forecasts updated.
+        """
+        end_date = datetime.utcnow().date()
+        start_date = end_date - timedelta(days=days_back)
+
+        day = day_of(Reservation.pickup_time)
+        hour = db.extract('hour', Reservation.pickup_time)
+        actuals = {
+            (meal_id, slot_date, f'{int(slot_hour):02d}:00'): quantity
+            for meal_id, slot_date, slot_hour, quantity in db.session.query(
+                Reservation.meal_id, day, hour, db.func.sum(Reservation.quantity)
+            ).filter(
+                Reservation.status == 'completed',
+                Reservation.pickup_time >= datetime.combine(start_date, datetime.min.time()),
+                Reservation.pickup_time < datetime.combine(end_date, datetime.min.time())
+            ).group_by(Reservation.meal_id, day, hour)
+        }
+
+        predictions = db.session.query(
+            Prediction.id, Prediction.meal_id, Prediction.date, Prediction.time_slot
+        ).filter(Prediction.date >= start_date, Prediction.date < end_date).all()
+
+        db.session.bulk_update_mappings(Prediction, [
+            {
+                'id': prediction_id,
+                'actual_demand': actuals.get((meal_id, slot_date, time_slot), 0)
+            }
+            for prediction_id, meal_id, slot_date, time_slot in predictions
+        ])
+        db.session.commit()
+        return len(predictions)
+
+    def forecast_accuracy(self, days_back=7):
+        """Mean absolute error of stored forecasts with known actual demand"""
+        start_date = datetime.utcnow().date() - timedelta(days=days_back)
+        mae, samples = db.session.query(
+            db.func.avg(db.func.abs(Prediction.predicted_demand - Prediction.actual_demand)),
+            db.func.count(Prediction.id)
+        ).filter(
+            Prediction.date >= start_date,
+            Prediction.actual_demand.isnot(None)
+        ).one()
+
+        return {'mae': round(float(mae), 2) if samples else None, 'samples': samples}
 
     def predict_rush_hours(self, target_date=None):
-        """Predict rush hours for a given date"""
+        """Predict rush hours for a given date
+
+        Forecasts are memoized per date for ``forecast_ttl`` seconds; the
+        background refresher keeps today's and tomorrow's always warm.
+        """
         if target_date is None:
             target_date = datetime.utcnow().date()
 
+        with self._forecasts_lock:
+            cached = self._forecasts.get(target_date)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        rush_data = self._compute_rush_hours(target_date)
+        self._store_forecast(target_date, rush_data)
+        return rush_data
+
+    def _compute_rush_hours(self, target_date):
+        with MODEL_INFERENCE.time(operation='rush_hours'):
+            return self._rush_hours_from_rollup(target_date)
+
+    def _rush_hours_from_rollup(self, target_date):
         # Get historical rush hour data for same day of week
         day_of_week = target_date.weekday()
 
-        # Get past reservations for this day of week
+        # Sum the hourly rollup over past days with the same weekday
+        counts = dict(
+            db.session.query(RushHour.hour, db.func.sum(RushHour.traffic_count)).filter(
+                db.extract('dow', RushHour.date) == (day_of_week + 1) % 7,
+                RushHour.hour.between(8, 20)
+            ).group_by(RushHour.hour).all()
+        )
+
         rush_data = {}
         for hour in range(8, 21):  # 8 AM to 8 PM
-            # Count reservations for this hour on similar days
-            count = Reservation.query.filter(
-                db.func.strftime('%w', Reservation.pickup_time) == str((day_of_week + 1) % 7),
-                db.func.strftime('%H', Reservation.pickup_time) == f'{hour:02d}'
-            ).count()
+            count = int(counts.get(hour) or 0)
 
             rush_data[hour] = {
                 'hour': hour,
@@ -185,18 +923,55 @@ class DemandPredictor:
 
         return rush_data
 
+    def _store_forecast(self, target_date, rush_data):
+        now = time.monotonic()
+        with self._forecasts_lock:
+            self._forecasts[target_date] = (now + self.forecast_ttl, rush_data)
+            for stale in [d for d, (expires_at, _) in self._forecasts.items() if expires_at <= now]:
+                del self._forecasts[stale]
+
+    def invalidate_forecasts(self, target_date=None):
+        """Drop the memoized forecast for ``target_date``, or all of them"""
+        with self._forecasts_lock:
+            if target_date is None:
+                self._forecasts.clear()
+            else:
+                self._forecasts.pop(target_date, None)
+
+    def warm_forecasts(self):
+        """Precompute rush hour forecasts for today and tomorrow"""
+        today = datetime.utcnow().date()
+        for target_date in (today, today + timedelta(days=1)):
+            self._store_forecast(target_date, self._compute_rush_hours(target_date))
+
+    def start_forecast_refresher(self, app, interval):
+        """Re-warm forecasts every ``interval`` seconds on a daemon thread"""
+        if self._refresher is not None:
+            return
+
+        def refresh():
+            while True:
+                time.sleep(interval)
+                try:
+                    with app.app_context():
+                        self.warm_forecasts()
+                except Exception as e:
+                    print(f"⚠ Forecast refresh failed: {e}")
+
+        self._refresher = threading.Thread(target=refresh, name='forecast-refresher', daemon=True)
+        self._refresher.start()
+
     def _classify_rush_level(self, count):
         """Classify rush level based on count"""
-        if count < 5:
-            return 'low'
-        elif count < 15:
-            return 'medium'
-        else:
-            return 'high'
+        return RushHour.classify(count)
+
+    def get_quiet_time_suggestions(self, target_date=None, rush_hours=None):
+        """Suggest quiet times to visit canteen
 
-    def get_quiet_time_suggestions(self, target_date=None):
-        """Suggest quiet times to visit canteen"""
-        rush_hours = self.predict_rush_hours(target_date)
+        Pass an already computed ``rush_hours`` mapping to avoid querying again.
+        """
+        if rush_hours is None:
+            rush_hours = self.predict_rush_hours(target_date)
 
         quiet_times = []
         for hour, data in sorted(rush_hours.items()):
@@ -212,5 +987,11 @@ class DemandPredictor:
         return quiet_times[:3]  # Return top 3 quiet times
 
 
-# Initialize predictor
-predictor = DemandPredictor()
+# Initialize predictor (the model itself is loaded on first use)
+predictor = DemandPredictor(
+    Config.MODEL_DIR,
+    Config.MODEL_KEEP_VERSIONS,
+    Config.FORECAST_TTL,
+    Config.FORECAST_DAYS,
+    Config.MODEL_BACKEND
+)
@@ -1,11 +1,126 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 import secrets
 
 db = SQLAlchemy()
 
+# Reservations still waiting to be picked up
+OPEN_STATUSES = ('pending', 'confirmed')
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, by dialect name
+UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def ensure_indexes():
+    """Create any model indexes missing from an existing database.
+
+    ``db.create_all`` only creates indexes together with new tables, so
+    databases created by older versions are upgraded here.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def keyset_page(query, columns, cursor=None, per_page=25, descending=False):
+    """Return one page of ``query`` ordered by ``columns``.
+
+    ``columns`` is a unique column, or a tuple of columns that are unique
+    together such as ``(created_at, id)``. ``cursor`` holds their values
+    for the last row of the previous page (a tuple for several columns),
+    so each page is an index range scan however deep it is. Returns
+    ``(items, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    single = not isinstance(columns, tuple)
+    if single:
+        columns = (columns,)
+
+    if cursor is not None:
+        values = (cursor,) if single else tuple(cursor)
+        # Rows after the cursor in (columns...) order, spelled out for
+        # databases without row values. The redundant bound on the first
+        # column lets the index range start at the cursor.
+        first, value = columns[0], values[0]
+        query = query.filter(first <= value if descending else first >= value)
+        query = query.filter(db.or_(*(
+            db.and_(
+                *(column == value for column, value in zip(columns[:i], values[:i])),
+                columns[i] < values[i] if descending else columns[i] > values[i]
+            )
+            for i in range(len(columns))
+        )))
+    query = query.order_by(*(column.desc() if descending else column for column in columns))
+
+    items = query.limit(per_page + 1).all()
+    if len(items) <= per_page:
+        return items, None
+
+    items = items[:per_page]
+    last = tuple(getattr(items[-1], column.key) for column in columns)
+    return items, last[0] if single else last
+
+
+def enable_sqlite_pragmas(engine, pragmas):
+    """Run ``PRAGMA name=value`` on every new connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+class day_of(FunctionElement):
+    """Calendar date of a DATETIME expression.
+
+    ``CAST(... AS DATE)`` on most databases; SQLite has no date type and
+    needs ``date(...)``. Hours and weekdays are portable already through
+    ``db.extract('hour', ...)`` and ``db.extract('dow', ...)``.
+    """
+    type = db.Date()
+    name = 'day_of'
+    inherit_cache = True
+
+
+@compiles(day_of)
+def _day_of(element, compiler, **kw):
+    return f'CAST({compiler.process(element.clauses, **kw)} AS DATE)'
+
+
+@compiles(day_of, 'sqlite')
+def _day_of_sqlite(element, compiler, **kw):
+    return f'date({compiler.process(element.clauses, **kw)})'
+
+
+class seconds_between(FunctionElement):
+    """Seconds from the second DATETIME expression to the first"""
+    type = db.Float()
+    name = 'seconds_between'
+    inherit_cache = True
+
+
+@compiles(seconds_between)
+def _seconds_between(element, compiler, **kw):
+    later, earlier = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f'EXTRACT(EPOCH FROM ({later} - {earlier}))'
+
+
+@compiles(seconds_between, 'sqlite')
+def _seconds_between_sqlite(element, compiler, **kw):
+    later, earlier = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f'((julianday({later}) - julianday({earlier})) * 86400.0)'
+
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
 
@@ -13,7 +128,7 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.String(20), nullable=False, default='student')  # 'student' or 'admin'
+    role = db.Column(db.String(20), nullable=False, default='student', index=True)  # 'student' or 'admin'
     department = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -35,6 +150,9 @@ class User(UserMixin, db.Model):
 
 class Meal(db.Model):
     __tablename__ = 'meals'
+    __table_args__ = (
+        db.Index('ix_meals_available_category', 'is_available', 'category'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -52,13 +170,26 @@ class Meal(db.Model):
     predictions = db.relationship('Prediction', backref='meal', lazy='dynamic')
 
     def update_stock(self, quantity):
-        self.stock += quantity
-        if self.stock <= 0:
-            self.stock = 0
-            self.is_available = False
-        else:
-            self.is_available = True
-        db.session.commit()
+        """Atomically adjust stock by ``quantity`` (negative to take stock).
+
+        Taking stock is a conditional UPDATE that only succeeds while enough
+        stock is left, so concurrent reservations cannot oversell. Returns
+        False if the update was refused. The change is left for the caller
+        to commit.
+        """
+        new_stock = Meal.stock + quantity
+        query = Meal.query.filter(Meal.id == self.id)
+        if quantity < 0:
+            query = query.filter(Meal.stock >= -quantity)
+
+        updated = query.update({
+            Meal.stock: db.case((new_stock <= 0, 0), else_=new_stock),
+            Meal.is_available: new_stock > 0
+        }, synchronize_session=False)
+
+        # Reload the new values on next access
+        db.session.expire(self, ['stock', 'is_available', 'updated_at'])
+        return updated == 1
 
     def to_dict(self):
         return {
@@ -78,12 +209,20 @@ class Meal(db.Model):
 
 class Reservation(db.Model):
     __tablename__ = 'reservations'
+    __table_args__ = (
+        db.Index('ix_reservations_user_status_pickup', 'user_id', 'status', 'pickup_time'),
+        # created_at bounds the recent-demand fallback in DemandPredictor
+        db.Index('ix_reservations_meal_status_created', 'meal_id', 'status', 'created_at'),
+        db.Index('ix_reservations_status', 'status'),
+        # Serves the newest-first history pages of one user
+        db.Index('ix_reservations_user_created', 'user_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     meal_id = db.Column(db.Integer, db.ForeignKey('meals.id'), nullable=False, index=True)
     pickup_time = db.Column(db.DateTime, nullable=False, index=True)
-    status = db.Column(db.String(20), default='pending')  # pending, confirmed, completed, cancelled
+    status = db.Column(db.String(20), default='pending')  # pending, confirmed, completed, cancelled, no_show
     token = db.Column(db.String(10), unique=True, nullable=False)
     quantity = db.Column(db.Integer, default=1)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -91,9 +230,35 @@ class Reservation(db.Model):
     def generate_token(self):
         self.token = secrets.token_hex(4).upper()
 
+    @classmethod
+    def book(cls, user_id, meal, pickup_time, quantity=1):
+        """Take stock and create a confirmed reservation in one commit.
+
+        Returns the reservation, or None if there was not enough stock.
+        """
+        if not meal.update_stock(-quantity):
+            db.session.rollback()
+            return None
+
+        reservation = cls(
+            user_id=user_id,
+            meal_id=meal.id,
+            pickup_time=pickup_time,
+            quantity=quantity,
+            status='confirmed'
+        )
+        reservation.generate_token()
+
+        db.session.add(reservation)
+        RushHour.record(pickup_time)
+        db.session.commit()
+        return reservation
+
     def cancel(self):
         if self.status == 'pending':
             self.status = 'cancelled'
+            RushHour.record(self.pickup_time, -1)
+            PickupSlot.release(self.pickup_time)
             # Return stock
             meal = Meal.query.get(self.meal_id)
             if meal:
@@ -103,9 +268,50 @@ class Reservation(db.Model):
         return False
 
     def complete(self):
+        if self.status == 'cancelled':
+            # A revived reservation counts towards traffic again
+            RushHour.record(self.pickup_time, 1)
         self.status = 'completed'
         db.session.commit()
 
+    @classmethod
+    def by_tokens(cls, tokens):
+        """Reservations with the given tokens, with their meal and user loaded"""
+        return cls.query.options(
+            db.joinedload(cls.meal),
+            db.joinedload(cls.user)
+        ).filter(cls.token.in_(tokens)).all()
+
+    @classmethod
+    def complete_tokens(cls, tokens):
+        """Mark the open reservations among ``tokens`` completed.
+
+        One UPDATE and one commit however many tokens are given. Cancelled
+        and already completed reservations are left alone. Returns the set
+        of tokens that were completed.
+        """
+        if not tokens:
+            return set()
+        completed = db.session.execute(
+            db.update(cls).where(
+                cls.token.in_(tokens),
+                cls.status.in_(OPEN_STATUSES)
+            ).values(status='completed').returning(cls.token)
+        ).scalars().all()
+        db.session.commit()
+        return set(completed)
+
+    @classmethod
+    def upcoming(cls, since, limit):
+        """Open reservations picked up from ``since`` on, soonest first"""
+        return cls.query.options(
+            db.joinedload(cls.meal),
+            db.joinedload(cls.user)
+        ).filter(
+            cls.pickup_time >= since,
+            cls.status.in_(OPEN_STATUSES)
+        ).order_by(cls.pickup_time, cls.id).limit(limit).all()
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -116,17 +322,82 @@ class Reservation(db.Model):
             'quantity': self.quantity
         }
 
+    def to_pickup_dict(self):
+        """``to_dict`` plus who collects the order, for the pickup counter"""
+        return {**self.to_dict(), 'username': self.user.username}
+
     def __repr__(self):
         return f'<Reservation {self.token}>'
 
 
+class PickupSlot(db.Model):
+    """Pickup capacity and bookings of one fixed-length slot at the counter
+
+    Slots are created a day at a time by ``scheduler.SlotScheduler``.
+    """
+    __tablename__ = 'pickup_slots'
+    __table_args__ = (
+        db.Index('uq_pickup_slots_start', 'start', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    start = db.Column(db.DateTime, nullable=False)
+    end = db.Column(db.DateTime, nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+    booked = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def _containing(cls, pickup_time):
+        return cls.query.filter(cls.start <= pickup_time, cls.end > pickup_time)
+
+    @classmethod
+    def take(cls, pickup_time):
+        """Book one pickup in the slot containing ``pickup_time``.
+
+        A conditional UPDATE like ``Meal.update_stock``, so concurrent
+        bookings cannot overfill a slot. Returns False if the slot is full
+        or does not exist. The change is left for the caller to commit.
+        """
+        updated = cls._containing(pickup_time).filter(cls.booked < cls.capacity).update(
+            {cls.booked: cls.booked + 1}, synchronize_session=False
+        )
+        return updated == 1
+
+    @classmethod
+    def release(cls, pickup_time):
+        """Free one pickup in the slot containing ``pickup_time``, if any"""
+        cls._containing(pickup_time).filter(cls.booked > 0).update(
+            {cls.booked: cls.booked - 1}, synchronize_session=False
+        )
+
+    @property
+    def available(self):
+        return max(0, self.capacity - self.booked)
+
+    def to_dict(self):
+        return {
+            'start': self.start.strftime('%Y-%m-%dT%H:%M'),
+            'end': self.end.strftime('%Y-%m-%dT%H:%M'),
+            'capacity': self.capacity,
+            'booked': self.booked,
+            'available': self.available
+        }
+
+    def __repr__(self):
+        return f'<PickupSlot {self.start:%Y-%m-%d %H:%M} {self.booked}/{self.capacity}>'
+
+
 class Prediction(db.Model):
     __tablename__ = 'predictions'
+    __table_args__ = (
+        db.Index('ix_predictions_meal_date_slot', 'meal_id', 'date', 'time_slot'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     meal_id = db.Column(db.Integer, db.ForeignKey('meals.id'), nullable=False)
     date = db.Column(db.Date, nullable=False, index=True)
-    time_slot = db.Column(db.String(20), nullable=False)  # breakfast, lunch, dinner
+    time_slot = db.Column(db.String(20), nullable=False)  # start of the hourly slot, e.g. '12:00'
     predicted_demand = db.Column(db.Integer, nullable=False)
     actual_demand = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -137,6 +408,11 @@ class Prediction(db.Model):
 
 class RushHour(db.Model):
     __tablename__ = 'rush_hours'
+    __table_args__ = (
+        db.Index('uq_rush_hours_date_hour', 'date', 'hour', unique=True),
+        # Covers the per-hour sums read by DemandPredictor.predict_rush_hours
+        db.Index('ix_rush_hours_hour_date', 'hour', 'date', 'traffic_count'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, index=True)
@@ -145,5 +421,74 @@ class RushHour(db.Model):
     rush_level = db.Column(db.String(20))  # low, medium, high
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @staticmethod
+    def classify(count):
+        """Classify rush level based on count"""
+        if count < 5:
+            return 'low'
+        elif count < 15:
+            return 'medium'
+        else:
+            return 'high'
+
+    @classmethod
+    def _level_expr(cls, count):
+        return db.case((count < 5, 'low'), (count < 15, 'medium'), else_='high')
+
+    @classmethod
+    def record(cls, pickup_time, delta=1):
+        """Adjust the traffic counter for the hour of ``pickup_time``.
+
+        A single INSERT ... ON CONFLICT DO UPDATE, so two first bookings of
+        an hour cannot both try to create its row; other databases insert
+        in a savepoint and update instead if the row turned up meanwhile.
+        The change is staged on the current session and committed together
+        with the reservation write that caused it.
+        """
+        slot_date = pickup_time.date()
+        slot_hour = pickup_time.hour
+        new_count = cls.traffic_count + delta
+        changes = {cls.traffic_count: new_count, cls.rush_level: cls._level_expr(new_count)}
+        count = max(0, delta)
+        row = {'date': slot_date, 'hour': slot_hour, 'traffic_count': count, 'rush_level': cls.classify(count)}
+
+        insert = UPSERT_INSERTS.get(db.session.get_bind(mapper=cls).dialect.name)
+        if insert is not None:
+            db.session.execute(insert(cls).values(**row).on_conflict_do_update(
+                index_elements=[cls.date, cls.hour], set_=changes
+            ))
+            return
+
+        slot = cls.query.filter_by(date=slot_date, hour=slot_hour)
+        if slot.update(changes, synchronize_session=False):
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(**row))
+        except IntegrityError:
+            slot.update(changes, synchronize_session=False)
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute the whole rollup from the reservations history"""
+        day = day_of(Reservation.pickup_time)
+        hour = db.extract('hour', Reservation.pickup_time)
+        rows = db.session.query(day, hour, db.func.count(Reservation.id)).filter(
+            Reservation.status.notin_(['cancelled', 'no_show'])
+        ).group_by(day, hour).all()
+
+        cls.query.delete()
+        db.session.bulk_insert_mappings(cls, [
+            {
+                'date': slot_date,
+                'hour': int(slot_hour),
+                'traffic_count': count,
+                'rush_level': cls.classify(count)
+            }
+            for slot_date, slot_hour, count in rows
+        ])
+        db.session.commit()
+        return len(rows)
+
     def __repr__(self):
         return f'<RushHour {self.date} {self.hour}:00>'
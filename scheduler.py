@@ -0,0 +1,127 @@
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, seconds_between, OPEN_STATUSES, PickupSlot, Reservation
+
+
+class SlotScheduler:
+    """Divides opening hours into fixed pickup slots with limited capacity
+
+    Each slot is a ``PickupSlot`` row whose ``booked`` counter is adjusted
+    with one conditional UPDATE per reservation. A day's slots are created
+    on first use, sized from the rush hour forecast: the counter is staffed
+    for the forecast level of each hour, and ``capacity`` maps those levels
+    to pickups per slot. Pickups can be booked from now until the end of the
+    ``booking_days``-th day, today included.
+    """
+
+    def __init__(self, predictor, open_time='08:00', close_time='20:00', slot_minutes=15,
+                 capacity=None, booking_days=7):
+        self.predictor = predictor
+        self.open_time = datetime.strptime(open_time, '%H:%M').time()
+        self.close_time = datetime.strptime(close_time, '%H:%M').time()
+        self.slot_length = timedelta(minutes=slot_minutes)
+        self.capacity = capacity or {'low': 10, 'medium': 15, 'high': 20}
+        self.booking_days = booking_days
+        self._days = set()  # dates whose slots are known to exist
+        self._lock = threading.Lock()
+
+    def slot_starts(self, target_date):
+        start = datetime.combine(target_date, self.open_time)
+        close = datetime.combine(target_date, self.close_time)
+        starts = []
+        while start + self.slot_length <= close:
+            starts.append(start)
+            start += self.slot_length
+        return starts
+
+    def is_open(self, pickup_time):
+        return self.open_time <= pickup_time.time() < self.close_time
+
+    def in_booking_window(self, target_date, today=None):
+        """Whether pickups can be booked on ``target_date``"""
+        today = today or datetime.now().date()
+        return 0 <= (target_date - today).days < self.booking_days
+
+    def ensure_day(self, target_date):
+        """Create the slots of ``target_date`` unless they exist already
+
+        Reservations made before the slots existed are counted in.
+        """
+        if target_date in self._days:
+            return
+
+        with self._lock:
+            if target_date in self._days:
+                return
+            if PickupSlot.query.filter_by(date=target_date).first() is None:
+                self._create_day(target_date)
+            self._days.add(target_date)
+
+    def _create_day(self, target_date):
+        slots = self._plan_day(target_date)
+        if not slots:
+            return
+
+        db.session.bulk_insert_mappings(PickupSlot, slots)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # Another worker created them first
+
+    def _plan_day(self, target_date):
+        starts = self.slot_starts(target_date)
+        if not starts:
+            return []
+
+        levels = self.predictor.predict_rush_hours(target_date)
+        booked = [0] * len(starts)
+        pickups = db.session.query(Reservation.pickup_time).filter(
+            Reservation.pickup_time >= starts[0],
+            Reservation.pickup_time < starts[-1] + self.slot_length,
+            Reservation.status.in_(OPEN_STATUSES)
+        )
+        for pickup_time, in pickups:
+            booked[bisect_right(starts, pickup_time) - 1] += 1
+
+        return [
+            {
+                'date': target_date,
+                'start': start,
+                'end': start + self.slot_length,
+                'capacity': self.capacity[levels.get(start.hour, {}).get('level', 'low')],
+                'booked': count
+            }
+            for start, count in zip(starts, booked)
+        ]
+
+    def nearest_free_slot(self, pickup_time, not_before=None):
+        """The free slot of the same day starting closest to ``pickup_time``
+
+        Only slots starting at or after ``not_before`` are considered.
+        Returns None when the day is fully booked.
+        """
+        self.ensure_day(pickup_time.date())
+        query = PickupSlot.query.filter(
+            PickupSlot.date == pickup_time.date(),
+            PickupSlot.booked < PickupSlot.capacity
+        )
+        if not_before is not None:
+            query = query.filter(PickupSlot.start >= not_before)
+
+        distance = db.func.abs(seconds_between(PickupSlot.start, pickup_time))
+        return query.order_by(distance, PickupSlot.start).first()
+
+    def day(self, target_date):
+        """All slots of ``target_date`` in order
+
+        Slots of a day nobody has booked yet are planned but not saved, so
+        looking at a day never writes to the database.
+        """
+        slots = PickupSlot.query.filter_by(date=target_date).order_by(PickupSlot.start).all()
+        if slots or target_date in self._days:
+            return slots
+        return [PickupSlot(**slot) for slot in self._plan_day(target_date)]
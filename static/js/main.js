@@ -32,6 +32,8 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    connectLiveFeed();
+
     // Add fade-in animation to cards
     const cards = document.querySelectorAll('.card');
     cards.forEach((card, index) => {
@@ -97,6 +99,10 @@ function createToastContainer() {
 
 // Real-time stock update
 function updateStockDisplay(mealId, newStock) {
+    document.querySelectorAll(`[data-stock-meal="${mealId}"]`).forEach(el => {
+        el.textContent = newStock;
+    });
+
     const stockBadges = document.querySelectorAll(`[data-meal-id="${mealId}"] .stock-badge`);
     stockBadges.forEach(badge => {
         badge.textContent = newStock;
@@ -110,6 +116,42 @@ function updateStockDisplay(mealId, newStock) {
     });
 }
 
+// Real-time rush level update
+function updateRushDisplay(hour, level) {
+    const levelClasses = {high: 'rush-high', medium: 'rush-medium', low: 'rush-low'};
+    const badgeClasses = {high: 'bg-danger', medium: 'bg-warning', low: 'bg-success'};
+
+    document.querySelectorAll(`[data-rush-hour="${hour}"]`).forEach(item => {
+        item.classList.remove(...Object.values(levelClasses));
+        item.classList.add(levelClasses[level] || 'rush-low');
+
+        const badge = item.querySelector('.badge');
+        if (badge) {
+            badge.classList.remove(...Object.values(badgeClasses));
+            badge.classList.add(badgeClasses[level] || 'bg-success');
+            badge.textContent = level.toUpperCase();
+        }
+    });
+}
+
+// Subscribe to stock and rush level updates pushed by the server
+function connectLiveFeed() {
+    if (!window.EventSource ||
+        !document.querySelector('[data-stock-meal], [data-rush-hour]')) {
+        return;
+    }
+
+    const source = new EventSource('/api/live');
+    source.addEventListener('stock', event => {
+        JSON.parse(event.data).meals.forEach(meal => updateStockDisplay(meal.id, meal.stock));
+    });
+    source.addEventListener('rush', event => {
+        JSON.parse(event.data).hours.forEach(data => updateRushDisplay(data.hour, data.level));
+    });
+    // Sent when this page fell too far behind to catch up
+    source.addEventListener('reset', () => location.reload());
+}
+
 // Search functionality
 function searchTable(inputId, tableId) {
     const input = document.getElementById(inputId);
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from metrics import NO_SHOWS
+from models import db, OPEN_STATUSES, Meal, Reservation, RushHour
+
+
+class NoShowSweeper:
+    """Marks reservations nobody picked up as no-shows and returns their stock
+
+    A reservation is a no-show once its pickup time is more than
+    ``grace_minutes`` in the past while it is still pending or confirmed.
+    Each batch of up to ``batch_size`` reservations is swept in one
+    transaction: a single UPDATE ... RETURNING flips their status, one
+    grouped UPDATE puts their quantities back on ``meals.stock``, and the
+    rush hour rollup drops them from the traffic counts. Because the status
+    check and the change are the same statement, an order completed at the
+    counter meanwhile is never restocked, and sweepers running in several
+    workers cannot sweep the same reservation twice.
+    """
+
+    def __init__(self, app, predictor, grace_minutes=30, batch_size=500):
+        self.app = app
+        self.predictor = predictor
+        self.grace = timedelta(minutes=grace_minutes)
+        self.batch_size = batch_size
+        self._thread = None
+
+    def sweep(self, now=None):
+        """Sweep every overdue reservation, a batch at a time; returns how many"""
+        cutoff = (now or datetime.now()) - self.grace
+        total = 0
+        while True:
+            swept = self._sweep_batch(cutoff)
+            total += swept
+            if swept < self.batch_size:
+                break
+
+        if total:
+            # Memoized forecasts still count the swept reservations
+            self.predictor.invalidate_forecasts()
+            NO_SHOWS.inc(total)
+        return total
+
+    def _sweep_batch(self, cutoff):
+        batch = db.select(Reservation.id).where(
+            Reservation.status.in_(OPEN_STATUSES),
+            Reservation.pickup_time < cutoff
+        ).order_by(Reservation.pickup_time).limit(self.batch_size)
+
+        rows = db.session.execute(
+            db.update(Reservation).where(
+                Reservation.id.in_(batch.scalar_subquery()),
+                Reservation.status.in_(OPEN_STATUSES)
+            ).values(status='no_show').returning(
+                Reservation.meal_id, Reservation.quantity, Reservation.pickup_time
+            ).execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            db.session.rollback()
+            return 0
+
+        restock = Counter()
+        slots = Counter()
+        for meal_id, quantity, pickup_time in rows:
+            restock[meal_id] += quantity or 0
+            slots[pickup_time.replace(minute=0, second=0, microsecond=0)] += 1
+
+        new_stock = Meal.stock + db.case(dict(restock), value=Meal.id, else_=0)
+        Meal.query.filter(Meal.id.in_(restock)).update({
+            Meal.stock: new_stock,
+            # Meals an admin took off the menu stay off
+            Meal.is_available: Meal.is_available | ((Meal.stock <= 0) & (new_stock > 0))
+        }, synchronize_session=False)
+
+        for slot, count in slots.items():
+            RushHour.record(slot, -count)
+
+        db.session.commit()
+        return len(rows)
+
+    def start(self, interval):
+        """Sweep every ``interval`` seconds on a daemon thread"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    with self.app.app_context():
+                        self.sweep()
+                except Exception as e:
+                    print(f"⚠ No-show sweep failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='no-show-sweeper', daemon=True)
+        self._thread.start()
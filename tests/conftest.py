@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Point the application at a scratch database, without background threads,
+# before it is imported
+_db_path = os.path.join(tempfile.mkdtemp(prefix='canteen-tests-'), 'tests.db')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{_db_path}'
+os.environ['FORECAST_REFRESH_SECONDS'] = '0'
+os.environ['NO_SHOW_SWEEP_SECONDS'] = '0'
+
+from app import app as canteen_app, api_cache, scheduler, user_cache  # noqa: E402
+from models import db, User, Meal, Reservation  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The application inside an app context, with empty tables"""
+    canteen_app.config['TESTING'] = True
+    with canteen_app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Per-process state describing the previous test's rows
+        api_cache.clear()
+        user_cache.clear()
+        scheduler._days.clear()
+        yield canteen_app
+        db.session.remove()
+
+
+@pytest.fixture
+def student(app):
+    user = User(username='student1', email='student1@university.com', role='student')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def admin_client(app):
+    """A test client logged in as an administrator"""
+    admin = User(username='admin', email='admin@canteen.com', role='admin')
+    admin.set_password('admin123')
+    db.session.add(admin)
+    db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+@pytest.fixture
+def meal(app):
+    meal = Meal(name='Pasta', price=5.5, category='lunch', stock=10)
+    db.session.add(meal)
+    db.session.commit()
+    return meal
+
+
+@pytest.fixture
+def make_reservation(student, meal):
+    """Add a reservation of ``meal`` by ``student``; keyword arguments override columns"""
+    count = 0
+
+    def make(**columns):
+        nonlocal count
+        count += 1
+        reservation = Reservation(**{
+            'user_id': student.id,
+            'meal_id': meal.id,
+            'pickup_time': datetime(2026, 3, 2, 12, 0),
+            'status': 'confirmed',
+            'token': f'T{count:07d}',
+            'quantity': 1,
+            **columns
+        })
+        db.session.add(reservation)
+        db.session.commit()
+        return reservation
+
+    return make
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [{'tokens': 5}, {'tokens': {'a': 1}}, {'tokens': ['T0000001', 7]}])
+def test_complete_pickups_rejects_malformed_tokens(admin_client, make_reservation, body):
+    make_reservation()
+    response = admin_client.post('/api/pickups/complete', json=body)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+
+
+def test_complete_pickups_accepts_a_list_or_a_string(admin_client, make_reservation):
+    for status in ('confirmed', 'pending', 'cancelled'):
+        make_reservation(status=status)
+
+    response = admin_client.post('/api/pickups/complete', json={'tokens': ['t0000001', 'FFFFFFFF']})
+    assert [item['result'] for item in response.get_json()['results']] == ['completed', 'not_found']
+
+    response = admin_client.post('/api/pickups/complete', json={'tokens': 'T0000002, T0000003'})
+    assert [item['result'] for item in response.get_json()['results']] == ['completed', 'cancelled']
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from app import api_cache, user_cache, _read_user
+from cache import UserCache
+from models import db, Meal, RushHour, User
+
+
+def cached_meals(app, builds):
+    def build():
+        builds.append(1)
+        return [meal.name for meal in Meal.query.order_by(Meal.id)]
+
+    with app.test_request_context('/api/meals'):
+        return api_cache.json_response('meals', build).get_json()
+
+
+def test_response_cache_clears_after_commits_to_watched_models(app, meal, student):
+    api_cache.clear()
+    builds = []
+    assert cached_meals(app, builds) == ['Pasta']
+    assert cached_meals(app, builds) == ['Pasta']
+    assert len(builds) == 1
+
+    # Users are not watched
+    student.department = 'Physics'
+    db.session.commit()
+    cached_meals(app, builds)
+    assert len(builds) == 1
+
+    meal.name = 'Penne'
+    db.session.commit()
+    assert cached_meals(app, builds) == ['Penne']
+    assert len(builds) == 2
+
+    # Bulk UPDATEs count as writes too
+    Meal.query.filter_by(id=meal.id).update({Meal.name: 'Fusilli'})
+    db.session.commit()
+    assert cached_meals(app, builds) == ['Fusilli']
+    assert len(builds) == 3
+
+
+def test_response_cache_keeps_entries_on_rollback(app, meal):
+    api_cache.clear()
+    builds = []
+    cached_meals(app, builds)
+
+    meal.name = 'Penne'
+    db.session.flush()
+    db.session.rollback()
+    assert cached_meals(app, builds) == ['Pasta']
+    assert len(builds) == 1
+
+
+def test_response_cache_clears_after_rush_hour_upserts(app):
+    api_cache.clear()
+    builds = []
+    cached_meals(app, builds)
+
+    RushHour.record(datetime(2026, 3, 2, 12, 0))
+    db.session.commit()
+    cached_meals(app, builds)
+    assert len(builds) == 2
+
+
+def test_user_cache_reloads_users_changed_by_a_commit(app, student):
+    user_cache.clear()
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return _read_user(user_id)
+
+    assert user_cache.get(student.id, load).department is None
+    assert user_cache.get(student.id, load).department is None
+    assert loads == [student.id]
+
+    student.department = 'Physics'
+    db.session.flush()
+    db.session.rollback()
+    user_cache.get(student.id, load)
+    assert loads == [student.id]
+
+    student.department = 'Physics'
+    db.session.commit()
+    assert user_cache.get(student.id, load).department == 'Physics'
+    assert loads == [student.id] * 2
+
+    User.query.filter_by(id=student.id).update({User.role: 'admin'})
+    db.session.commit()
+    assert user_cache.get(student.id, load).is_admin()
+    assert loads == [student.id] * 3
+
+
+def test_user_cache_evicts_least_recently_used(app):
+    cache = UserCache(maxsize=2, ttl=60)
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return user_id
+
+    for user_id in (1, 2, 1, 3, 1, 2):
+        cache.get(user_id, load)
+    assert loads == [1, 2, 3, 2]
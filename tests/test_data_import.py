@@ -0,0 +1,40 @@
+from data_import import BulkImporter, TOKEN_PREFIX
+from models import Meal, Reservation, User
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_csv_import_keeps_numeric_usernames_and_tokens_as_text(app, tmp_path):
+    importer = BulkImporter(chunk_size=2, default_password='password123')
+    users = write(tmp_path / 'users.csv', 'username,email,department\n'
+                  '1001,1001@university.com,\n'
+                  '1002,1002@university.com,Physics\n'
+                  '1001,other@university.com,\n')
+    meals = write(tmp_path / 'meals.csv', 'name,price,category,stock,is_available\n'
+                  'Pasta,5.50,lunch,10,true\n'
+                  '42,1.20,snack,3,False\n')
+    history = write(tmp_path / 'history.csv', 'username,meal_name,pickup_time,token,quantity,status\n'
+                    '1001,Pasta,2026-03-02T12:00:00,00001234,2,\n'
+                    '1002,42,2026-03-02T13:15:00,,1,cancelled\n'
+                    '1003,Pasta,2026-03-02T13:30:00,,1,\n'
+                    '1002,Pasta,2026-03-02T14:00:00,00001234,1,\n')
+
+    assert importer.load_file('users', users) == (2, 1)
+    assert importer.load_file('meals', meals) == (2, 0)
+    assert importer.load_file('reservations', history) == (2, 2)
+
+    assert User.query.filter_by(username='1002').one().department == 'Physics'
+    assert User.query.filter_by(username='1001').one().department is None
+    assert Meal.query.filter_by(name='42').one().is_available is False
+    assert Meal.query.filter_by(name='Pasta').one().price == 5.5
+
+    reservations = {r.token: r for r in Reservation.query}
+    assert reservations['00001234'].user.username == '1001'
+    assert reservations['00001234'].quantity == 2
+    assert reservations['00001234'].status == 'completed'
+    generated, = (r for token, r in reservations.items() if token.startswith(TOKEN_PREFIX))
+    assert generated.meal.name == '42'
+    assert generated.status == 'cancelled'
@@ -0,0 +1,52 @@
+from metrics import Counter, Histogram, Registry
+
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = Registry()
+    requests = registry.register(Counter('app_requests', 'Requests handled', ['endpoint']))
+    latency = registry.register(Histogram('app_latency_seconds', 'Latency', buckets=(0.1, 1.0)))
+
+    requests.inc(endpoint='menu')
+    requests.inc(2, endpoint='say "hi"\n')
+    for value in (0.05, 0.5, 3):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        '# HELP app_requests Requests handled',
+        '# TYPE app_requests counter',
+        'app_requests_total{endpoint="menu"} 1',
+        'app_requests_total{endpoint="say \\"hi\\"\\n"} 2',
+        '# HELP app_latency_seconds Latency',
+        '# TYPE app_latency_seconds histogram',
+        'app_latency_seconds_bucket{le="0.1"} 1',
+        'app_latency_seconds_bucket{le="1.0"} 2',
+        'app_latency_seconds_bucket{le="+Inf"} 3',
+        'app_latency_seconds_sum 3.55',
+        'app_latency_seconds_count 3',
+    ]
+
+
+def sample(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_metrics_endpoint_counts_requests_and_sql_statements(app, meal):
+    client = app.test_client()
+    client.get('/api/meals')
+    client.get('/api/meals')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    total, = sample(text, 'canteen_http_requests_total{method="GET",endpoint="api_meals",status="200"}')
+    assert int(total.split()[-1]) >= 2
+    assert sample(text, 'canteen_http_request_sql_statements_count{method="GET",endpoint="api_meals"}')
+    assert sample(text, 'canteen_http_request_db_duration_seconds_sum{method="GET",endpoint="api_meals"}')
+    assert sample(text, '# TYPE canteen_http_request_duration_seconds histogram')
+
+
+def test_metrics_endpoint_requires_the_token_when_configured(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'secret')
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
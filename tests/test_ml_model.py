@@ -0,0 +1,58 @@
+import numpy as np
+
+from benchmarks import campus
+from ml_model import DemandPredictor, BUCKET_KEYS, TRAINING_STATUSES
+from models import db, Reservation
+
+
+def test_incremental_training_drops_expired_days_whatever_their_status(app, tmp_path):
+    campus.synthesize(users=50, reservations=5000, meals=8, days=30, seed=7)
+    incremental = DemandPredictor(model_dir=str(tmp_path / 'incremental'))
+    assert incremental.train(days_back=30) is not None
+
+    campus.add_reservations(500, 2, np.random.default_rng(8), first_token=5000)
+    # Orders counted by the first training, made on days about to age out,
+    # turn into no-shows; they must leave with their days all the same
+    window_start = DemandPredictor._window_start(20)
+    no_shows = Reservation.query.filter(
+        Reservation.status.in_(TRAINING_STATUSES),
+        Reservation.created_at < window_start
+    ).update({Reservation.status: 'no_show'})
+    db.session.commit()
+    assert no_shows
+
+    updated = incremental.train_incremental(days_back=20)
+    full = DemandPredictor(model_dir=str(tmp_path / 'full'))
+    full.train(days_back=20)
+
+    assert updated['mode'] == 'incremental'
+    assert updated['new_reservations'] > 0
+    key = lambda frame: frame.sort_values(BUCKET_KEYS).reset_index(drop=True)
+    assert key(incremental._state['buckets']).equals(key(full._state['buckets']))
+
+
+def test_incremental_training_reads_ids_committed_behind_the_watermark(app, tmp_path):
+    campus.synthesize(users=50, reservations=3000, meals=8, days=30, seed=7)
+    # A reservation whose transaction has taken its id but not committed yet
+    late = Reservation.query.filter(
+        Reservation.status.in_(TRAINING_STATUSES),
+        Reservation.created_at >= DemandPredictor._window_start(20)
+    ).order_by(Reservation.id.desc()).offset(10).first()
+    row = {column.key: getattr(late, column.key) for column in Reservation.__table__.columns}
+    db.session.delete(late)
+    db.session.commit()
+
+    incremental = DemandPredictor(model_dir=str(tmp_path / 'incremental'))
+    incremental.train(days_back=20)
+    assert incremental._state['unseen_ids'] == [row['id']]
+
+    db.session.add(Reservation(**row))
+    db.session.commit()
+    updated = incremental.train_incremental(days_back=20)
+    assert updated['new_reservations'] == 1
+    assert incremental._state['unseen_ids'] == []
+
+    full = DemandPredictor(model_dir=str(tmp_path / 'full'))
+    full.train(days_back=20)
+    key = lambda frame: frame.sort_values(BUCKET_KEYS).reset_index(drop=True)
+    assert key(incremental._state['buckets']).equals(key(full._state['buckets']))
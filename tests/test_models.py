@@ -0,0 +1,134 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+import models
+from models import db, keyset_page, Meal, Reservation, RushHour
+
+
+def collect_pages(query, columns, per_page, descending=False):
+    items, cursor, pages = [], None, 0
+    while True:
+        page, cursor = keyset_page(query, columns, cursor, per_page, descending)
+        items.extend(page)
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+
+def test_keyset_page_walks_ties_on_the_first_column(make_reservation):
+    same_time = datetime(2026, 3, 1, 9, 0)
+    for minute in (0, 0, 0, 5, 5, 10, 20):
+        make_reservation(created_at=same_time.replace(minute=minute))
+    expected = sorted(Reservation.query.all(), key=lambda r: (r.created_at, r.id))
+    columns = (Reservation.created_at, Reservation.id)
+
+    items, pages = collect_pages(Reservation.query, columns, per_page=2)
+    assert [r.id for r in items] == [r.id for r in expected]
+    assert pages == 4
+
+    items, _ = collect_pages(Reservation.query, columns, per_page=3, descending=True)
+    assert [r.id for r in items] == [r.id for r in reversed(expected)]
+
+
+def test_keyset_page_on_a_single_column(app):
+    db.session.add_all([Meal(name=f'Meal {i}', price=3, category='snack') for i in range(5)])
+    db.session.commit()
+
+    page, cursor = keyset_page(Meal.query, Meal.id, per_page=3)
+    assert [meal.id for meal in page] == [1, 2, 3]
+    assert cursor == 3
+
+    page, cursor = keyset_page(Meal.query, Meal.id, cursor, per_page=3)
+    assert [meal.id for meal in page] == [4, 5]
+    assert cursor is None
+
+
+def test_update_stock_refuses_to_oversell(meal):
+    assert meal.update_stock(-4)
+    assert not meal.update_stock(-7)
+    db.session.commit()
+    assert (meal.stock, meal.is_available) == (6, True)
+
+    assert meal.update_stock(-6)
+    db.session.commit()
+    assert (meal.stock, meal.is_available) == (0, False)
+
+    assert meal.update_stock(2)
+    db.session.commit()
+    assert (meal.stock, meal.is_available) == (2, True)
+
+
+def test_concurrent_bookings_never_oversell(app, student, meal):
+    meal_id, student_id = meal.id, student.id
+    pickup = datetime(2026, 3, 2, 12, 0)
+    results = []
+
+    def book():
+        with app.app_context():
+            results.append(Reservation.book(student_id, db.session.get(Meal, meal_id), pickup) is not None)
+
+    threads = [threading.Thread(target=book) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert results.count(True) == 10
+    assert Reservation.query.count() == 10
+    assert db.session.get(Meal, meal_id).stock == 0
+
+
+def test_complete_tokens_only_completes_open_reservations(make_reservation):
+    statuses = {'T0000001': 'confirmed', 'T0000002': 'pending',
+                'T0000003': 'cancelled', 'T0000004': 'completed', 'T0000005': 'no_show'}
+    for status in statuses.values():
+        make_reservation(status=status)
+
+    completed = Reservation.complete_tokens(list(statuses) + ['FFFFFFFF'])
+
+    assert completed == {'T0000001', 'T0000002'}
+    db.session.expire_all()
+    assert {r.token: r.status for r in Reservation.query} == {
+        **statuses, 'T0000001': 'completed', 'T0000002': 'completed'
+    }
+    assert Reservation.complete_tokens([]) == set()
+
+
+def rollup():
+    return {(row.date, row.hour): (row.traffic_count, row.rush_level) for row in RushHour.query}
+
+
+def test_rush_hour_rollup_follows_book_cancel_and_complete(student, meal, make_reservation):
+    noon = datetime(2026, 3, 2, 12, 15)
+    booked = [Reservation.book(student.id, meal, noon) for _ in range(5)]
+    assert rollup() == {(noon.date(), 12): (5, 'medium')}
+
+    pending = make_reservation(status='pending', pickup_time=noon.replace(hour=13))
+    RushHour.record(pending.pickup_time)
+    db.session.commit()
+    assert pending.cancel()
+    assert rollup() == {(noon.date(), 12): (5, 'medium'), (noon.date(), 13): (0, 'low')}
+
+    # Picking up leaves the count alone; a cancelled order picked up anyway counts again
+    Reservation.complete_tokens([booked[0].token])
+    make_reservation(status='cancelled', pickup_time=noon).complete()
+    assert rollup() == {(noon.date(), 12): (6, 'medium'), (noon.date(), 13): (0, 'low')}
+
+    RushHour.rebuild()
+    assert rollup() == {(noon.date(), 12): (6, 'medium')}
+
+
+@pytest.mark.parametrize('upsert', [True, False], ids=['on-conflict', 'savepoint'])
+def test_rush_hour_record_upserts_one_row_per_hour(app, monkeypatch, upsert):
+    if not upsert:
+        monkeypatch.setattr(models, 'UPSERT_INSERTS', {})
+    noon = datetime(2026, 3, 2, 12, 0)
+    RushHour.record(noon)
+    RushHour.record(noon.replace(minute=45), 14)
+    RushHour.record(noon.replace(hour=9), -1)
+    db.session.commit()
+
+    assert rollup() == {(noon.date(), 12): (15, 'high'), (noon.date(), 9): (0, 'low')}
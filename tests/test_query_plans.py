@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_routes_use_indexes_within_query_budget():
+    # The check points the app at its own database when imported, so it
+    # runs in a fresh interpreter rather than next to the test database
+    result = subprocess.run(
+        [sys.executable, '-c', 'import sys; from benchmarks.query_plans import main; sys.exit(main())'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from ml_model import predictor
+from models import db, PickupSlot, Reservation
+from scheduler import SlotScheduler
+
+DAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def scheduler(app):
+    return SlotScheduler(predictor, '08:00', '10:00', 30, {'low': 2, 'medium': 3, 'high': 4}, booking_days=7)
+
+
+def test_booking_window_covers_today_and_the_next_days(scheduler):
+    assert scheduler.in_booking_window(DAY, today=DAY)
+    assert scheduler.in_booking_window(DAY + timedelta(days=6), today=DAY)
+    assert not scheduler.in_booking_window(DAY + timedelta(days=7), today=DAY)
+    assert not scheduler.in_booking_window(DAY - timedelta(days=1), today=DAY)
+
+
+def test_day_plans_missing_slots_without_saving_them(scheduler):
+    slots = scheduler.day(DAY)
+
+    assert [slot.start.strftime('%H:%M') for slot in slots] == ['08:00', '08:30', '09:00', '09:30']
+    assert [slot.available for slot in slots] == [2] * 4
+    assert PickupSlot.query.count() == 0
+
+
+def test_slots_fill_up_and_suggest_the_nearest_free_one(scheduler, make_reservation):
+    make_reservation(pickup_time=datetime(2026, 3, 2, 8, 40))  # Booked before the slots existed
+    scheduler.ensure_day(DAY)
+    assert PickupSlot.query.count() == 4
+
+    pickup = datetime(2026, 3, 2, 8, 35)
+    assert PickupSlot.take(pickup)
+    assert not PickupSlot.take(pickup)
+    assert not PickupSlot.take(datetime(2026, 3, 2, 10, 0))  # After closing
+    db.session.commit()
+
+    assert scheduler.nearest_free_slot(pickup).start == datetime(2026, 3, 2, 9, 0)
+    assert scheduler.nearest_free_slot(pickup, not_before=datetime(2026, 3, 2, 9, 15)).start == \
+        datetime(2026, 3, 2, 9, 30)
+    for _ in range(2):
+        PickupSlot.take(datetime(2026, 3, 2, 9, 10))
+    db.session.commit()
+    assert scheduler.nearest_free_slot(pickup).start == datetime(2026, 3, 2, 8, 0)
+
+    PickupSlot.release(pickup)
+    db.session.commit()
+    assert [slot.booked for slot in scheduler.day(DAY)] == [0, 1, 2, 0]
+
+
+def test_pickup_slot_api_only_answers_inside_the_booking_window(app):
+    client = app.test_client()
+    today = datetime.now().date()
+
+    assert client.get('/api/pickup-slots?date=2999-01-01').status_code == 400
+    assert client.get(f'/api/pickup-slots?date={today - timedelta(days=1)}').status_code == 400
+    assert client.get('/api/pickup-slots?date=tomorrow').status_code == 400
+
+    response = client.get(f'/api/pickup-slots?date={today + timedelta(days=3)}')
+    assert response.status_code == 200
+    assert response.get_json()
+    assert PickupSlot.query.count() == 0
+
+
+def test_reservations_outside_the_booking_window_are_rejected(app, student, meal):
+    client = app.test_client()
+    client.post('/login', data={'username': 'student1', 'password': 'password123'})
+    now = datetime.now()
+
+    for pickup in (now - timedelta(days=1), now + timedelta(days=7)):
+        response = client.post('/student/reserve', data={
+            'meal_id': meal.id, 'pickup_time': pickup.strftime('%Y-%m-%dT12:00'), 'quantity': 1
+        }, follow_redirects=True)
+        assert 'within the next 7 days' in response.get_data(as_text=True)
+    assert Reservation.query.count() == 0
+    assert PickupSlot.query.count() == 0
+
+    client.post('/student/reserve', data={
+        'meal_id': meal.id, 'pickup_time': (now + timedelta(days=2)).strftime('%Y-%m-%dT12:00'), 'quantity': 1
+    })
+    assert Reservation.query.count() == 1
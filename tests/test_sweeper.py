@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from ml_model import predictor
+from models import db, Meal, Reservation, RushHour
+from sweeper import NoShowSweeper
+
+NOW = datetime(2026, 3, 2, 14, 0)
+OVERDUE = datetime(2026, 3, 2, 12, 0)
+
+
+@pytest.fixture
+def sweeper(app):
+    return NoShowSweeper(app, predictor, grace_minutes=30, batch_size=2)
+
+
+def test_sweep_marks_overdue_reservations_and_restocks(sweeper, meal, make_reservation):
+    for status in ('confirmed', 'pending', 'confirmed', 'pending', 'confirmed', 'completed', 'cancelled'):
+        make_reservation(status=status, quantity=2)
+        RushHour.record(OVERDUE)
+    make_reservation(pickup_time=NOW - timedelta(minutes=10))  # Still within the grace period
+    db.session.commit()
+
+    assert sweeper.sweep(now=NOW) == 5
+
+    db.session.expire_all()
+    statuses = [r.status for r in Reservation.query.order_by(Reservation.id)]
+    assert statuses == ['no_show'] * 5 + ['completed', 'cancelled', 'confirmed']
+    assert db.session.get(Meal, meal.id).stock == 20
+    assert RushHour.query.filter_by(date=OVERDUE.date(), hour=12).one().traffic_count == 2
+    assert sweeper.sweep(now=NOW) == 0
+
+
+def test_sweep_only_puts_sold_out_meals_back_on_the_menu(sweeper, meal, make_reservation):
+    hidden = Meal(name='Soup', price=3, category='lunch', stock=5, is_available=False)
+    meal.stock, meal.is_available = 0, False
+    db.session.add(hidden)
+    db.session.commit()
+    make_reservation()
+    make_reservation(meal_id=hidden.id)
+
+    assert sweeper.sweep(now=NOW) == 2
+
+    db.session.expire_all()
+    assert db.session.get(Meal, meal.id).is_available
+    assert db.session.get(Meal, meal.id).stock == 1
+    assert not db.session.get(Meal, hidden.id).is_available
+    assert db.session.get(Meal, hidden.id).stock == 6